@@ -1,10 +1,23 @@
+import time
+_INICIO_IMPORTACAO = time.perf_counter()
+
 import flet as ft
-import json
+import atexit
 import os
-import time
 import asyncio
+import math
 from flet import Icons
 
+from cronometros import AgendadorCronometros, Cronometro, ProgramaIntervalos
+from historico_treinos import registrar_serie
+from imagens import caminho_imagem
+from instrumentacao import AtualizadorPagina, acao_do_usuario, iniciar_despejo_periodico, medir, metricas
+from persistencia import CacheUsuarios, criar_repositorio, migrar_de_json, normalizar_email
+from seguranca import LimitadorTentativas, gerar_hash_senha_async, verificar_senha_async
+from sessoes import TabelaSessoes, carregar_chave
+
+_TEMPO_IMPORTACAO = time.perf_counter() - _INICIO_IMPORTACAO
+
 # ===================================================================
 # 1. CONSTANTES GLOBAIS
 # Define valores fixos usados em todo o aplicativo.
@@ -12,26 +25,180 @@ from flet import Icons
 
 NUMERO_WHATSAPP = "5511939222617"
 ARQUIVO_USUARIOS = "users.json"
+ARQUIVO_SESSOES = "sessoes.db"
+# Chave do client_storage onde o navegador guarda o token de sessão
+# do "Manter conectado".
+CHAVE_TOKEN_SESSAO = "espaco_fitness.sessao"
+# Backend de armazenamento dos usuários: "json", "sqlite" ou "journal".
+BACKEND_USUARIOS = os.environ.get("ESPACO_FITNESS_BACKEND", "sqlite")
+# Ligado pelo servidor.py quando o app roda em vários processos. Nesse
+# modo os dados precisam estar no SQLite (compartilhado entre os
+# processos) e os cadastros são gravados na hora, sem fila.
+MULTIPROCESSO = os.environ.get("ESPACO_FITNESS_MULTIPROCESSO") == "1"
+# Tempo máximo que o app espera, ao sair, pela gravação dos cadastros
+# ainda na fila.
+ESPERA_GRAVACAO_AO_SAIR = 10
+
+# Renderização do cronômetro: "controle" envia só o texto do tempo
+# (texto_tempo.update()); "pagina" é o modo antigo, com page.update().
+MODO_RENDER_CRONOMETRO = os.environ.get("ESPACO_FITNESS_MODO_CRONOMETRO", "controle")
+# Ticks por segundo do agendador que redesenha os cronômetros
+# visíveis (cronômetros escondidos não são redesenhados).
+TAXA_CRONOMETRO_HZ = 20
+# Programas de intervalos oferecidos no cronômetro (None = livre).
+PROGRAMAS_INTERVALO = {
+    "livre": None,
+    "tabata": ProgramaIntervalos("Tabata (20s/10s x8)", 20, 10, 8),
+    "hiit": ProgramaIntervalos("HIIT (40s/20s x10)", 40, 20, 10),
+    "forca": ProgramaIntervalos("Força (60s/90s x5)", 60, 90, 5),
+}
+
+# Um único agendador por processo redesenha os cronômetros de todas
+# as sessões.
+agendador_cronometros = AgendadorCronometros(TAXA_CRONOMETRO_HZ)
+
+# Limite de tentativas de login: (tentativas seguidas, fichas devolvidas
+# por segundo) por email e por cliente (IP). Os limites valem para
+# todas as sessões e, com vários processos, para todos eles (os baldes
+# ficam no banco das sessões).
+LIMITE_LOGIN_EMAIL = (5, 1 / 20)
+LIMITE_LOGIN_CLIENTE = (20, 1.0)
+
+# Emails (separados por vírgula) dos administradores, que veem a tela
+# de métricas no menu lateral.
+ADMINS = {normalizar_email(e) for e in os.environ.get("ESPACO_FITNESS_ADMINS", "").split(",") if e.strip()}
+
+# Com ESPACO_FITNESS_TEMPOS_INICIO=1, cada sessão imprime quanto tempo
+# levou a importação, a construção de cada tela e o primeiro update.
+MEDIR_TEMPOS_INICIO = os.environ.get("ESPACO_FITNESS_TEMPOS_INICIO") == "1"
 
 # ===================================================================
 # 2. FUNÇÕES DE PERSISTÊNCIA DE DADOS
-# Funções responsáveis por ler e salvar os dados dos usuários
-# em um arquivo JSON local.
+# Funções responsáveis por ler e salvar os dados dos usuários.
+# O armazenamento em si fica no módulo 'persistencia', que oferece
+# os backends JSON, SQLite e diário append-only.
 # ===================================================================
 
-# Carrega a lista de usuários do arquivo JSON. Se o arquivo não
-# existir, cria um novo com uma lista vazia.
+_repositorio = None
+_cache_usuarios = None
+
+# Retorna o repositório de usuários, criando-o (e migrando o
+# users.json antigo, se for o caso) na primeira chamada.
+def obter_repositorio():
+    global _repositorio
+    if _repositorio is None:
+        if MULTIPROCESSO and BACKEND_USUARIOS != "sqlite":
+            raise RuntimeError("Com vários processos o backend de usuários precisa ser 'sqlite'.")
+        _repositorio = criar_repositorio(BACKEND_USUARIOS, ARQUIVO_USUARIOS)
+        migrar_de_json(_repositorio, ARQUIVO_USUARIOS)
+    return _repositorio
+
+# Retorna o cache de usuários compartilhado por todas as sessões do
+# processo. Só a primeira sessão paga a leitura dos dados; as demais
+# reaproveitam a mesma cópia em memória. Os cadastros são gravados em
+# segundo plano pela fila do cache, que é esvaziada ao sair do app.
+# Com vários processos o cache não é usado (veja buscar_usuario).
+def obter_cache_usuarios():
+    global _cache_usuarios
+    if _cache_usuarios is None:
+        _cache_usuarios = CacheUsuarios(obter_repositorio(), gravacao_adiada=not MULTIPROCESSO)
+        atexit.register(_cache_usuarios.esvaziar, ESPERA_GRAVACAO_AO_SAIR)
+    return _cache_usuarios
+
+# Retorna a tabela de sessões do "Manter conectado", compartilhada por
+# todas as sessões do processo. Com vários processos as sessões são
+# lidas sempre do banco, para que um logout valha em todos eles.
+_tabela_sessoes = None
+
+def obter_tabela_sessoes():
+    global _tabela_sessoes
+    if _tabela_sessoes is None:
+        _tabela_sessoes = TabelaSessoes(carregar_chave(), ARQUIVO_SESSOES, cache_memoria=not MULTIPROCESSO)
+    return _tabela_sessoes
+
+# Limitadores das tentativas de login (cliente, email), criados no
+# primeiro uso.
+_limites_login = None
+
+def obter_limites_login():
+    global _limites_login
+    if _limites_login is None:
+        arquivo = ARQUIVO_SESSOES if MULTIPROCESSO else None
+        _limites_login = (LimitadorTentativas(*LIMITE_LOGIN_CLIENTE, arquivo=arquivo, nome="login_cliente"),
+                          LimitadorTentativas(*LIMITE_LOGIN_EMAIL, arquivo=arquivo, nome="login_email"))
+    return _limites_login
+
+# Registra uma tentativa de login e retorna 0 se ela pode seguir, ou
+# quantos segundos o cliente deve esperar. O cliente é contado antes
+# do email, para que um script variando emails também seja barrado.
+# Com vários processos consulta o SQLite: os handlers a chamam com
+# asyncio.to_thread.
+def tentativa_de_login(cliente, email: str) -> float:
+    limite_cliente, limite_email = obter_limites_login()
+    espera = limite_cliente.consumir(cliente)
+    if espera:
+        return espera
+    return limite_email.consumir(normalizar_email(email))
+
+# Consulta e alterações de um usuário feitas pelos handlers. Em um
+# processo usam o cache compartilhado. Com vários processos, cada
+# cadastro feito em outro processo obrigaria o cache a reler a tabela
+# inteira, então elas vão direto ao SQLite: busca pelo índice de
+# email_chave, e o índice único dele decide entre dois cadastros do
+# mesmo email em processos diferentes. Todas podem esperar por disco
+# ou por locks: os handlers as chamam com asyncio.to_thread.
+def buscar_usuario(email: str):
+    if MULTIPROCESSO:
+        return obter_repositorio().buscar_por_email(email)
+    return obter_cache_usuarios().buscar(email)
+
+def adicionar_usuario(usuario: dict) -> bool:
+    if MULTIPROCESSO:
+        return obter_repositorio().adicionar(usuario)
+    return obter_cache_usuarios().adicionar(usuario)
+
+def atualizar_senha_usuario(email: str, password: str) -> bool:
+    if MULTIPROCESSO:
+        return obter_repositorio().atualizar_senha(email, password)
+    return obter_cache_usuarios().atualizar_senha(email, password)
+
+# Carrega a lista de usuários do repositório configurado.
 def carregar_usuarios():
-    if not os.path.exists(ARQUIVO_USUARIOS):
-        with open(ARQUIVO_USUARIOS, "w") as f:
-            json.dump([], f)
-    with open(ARQUIVO_USUARIOS, "r") as f:
-        return json.load(f)
+    return obter_repositorio().carregar()
 
-# Salva a lista atual de usuários de volta no arquivo JSON.
+# Salva a lista atual de usuários de volta no repositório.
+# Prefira adicionar_usuario() para novos cadastros, que não reescreve
+# todos os dados.
 def salvar_usuarios(usuarios):
-    with open(ARQUIVO_USUARIOS, "w") as f:
-        json.dump(usuarios, f, indent=4)
+    if MULTIPROCESSO:
+        obter_repositorio().salvar_todos(usuarios)
+        return
+    obter_cache_usuarios().esvaziar()
+    obter_repositorio().salvar_todos(usuarios)
+    obter_cache_usuarios().recarregar()
+
+# Imprime uma medição de tempo de inicialização (modo de diagnóstico).
+def registrar_tempo_inicio(etapa: str, segundos: float):
+    if MEDIR_TEMPOS_INICIO:
+        print(f"[inicio] {etapa}: {segundos * 1000:.1f} ms")
+
+# Versões assíncronas: executam a leitura/escrita em uma thread do
+# pool padrão do asyncio, sem travar o loop de eventos do Flet.
+async def carregar_usuarios_async():
+    return await asyncio.to_thread(carregar_usuarios)
+
+async def salvar_usuarios_async(usuarios):
+    await asyncio.to_thread(salvar_usuarios, usuarios)
+
+# Faz a primeira leitura do cache compartilhado fora do loop de eventos.
+# Com vários processos não há cache: só abre o repositório.
+async def preparar_cache_usuarios_async():
+    if MULTIPROCESSO:
+        await asyncio.to_thread(obter_repositorio)
+        return None
+    cache = obter_cache_usuarios()
+    await asyncio.to_thread(cache.usuarios)
+    return cache
 
 # ===================================================================
 #CLASSE PRINCIPAL DA APLICAÇÃO (LÓGICA DE LOGIN E NAVEGAÇÃO)
@@ -45,18 +212,54 @@ class AcademiaApp:
     # -----------------------------------------------------------
     # Método construtor: configura a página e chama a construção dos componentes.
     def __init__(self, page: ft.Page):
+        self._inicio_sessao = time.perf_counter()
         self.page = page
         self.page.title = "Espaço Fitness Academia"
         self.page.theme_mode = ft.ThemeMode.DARK
         self.page.padding = 20
         self.page.scroll = ft.ScrollMode.AUTO
 
+        # Todas as atualizações da página passam pelo atualizador, que
+        # junta as de um mesmo clique em um único envio e as contabiliza.
+        self.atualizador = AtualizadorPagina(page)
+        self.page.on_close = self._ao_fechar_sessao
+
         self.usuario_logado = False
         self.usuario_atual = None
-        self.usuarios = carregar_usuarios()
+        # Cache compartilhado: nenhuma leitura de arquivo por sessão
+        # (None com vários processos, que consultam o SQLite direto).
+        self.cache_usuarios = None if MULTIPROCESSO else obter_cache_usuarios()
+        self.sessoes = obter_tabela_sessoes()
+        # Token de sessão do "Manter conectado" (None se não marcado).
+        self.token_sessao = None
+
+        # Telas principais já construídas nesta sessão (destino -> View)
+        # e componentes com ciclo de vida (destino -> objeto com os
+        # métodos ao_montar/ao_desmontar, como o CronometroApp).
+        self._telas_principais = {}
+        self._componentes = {}
+        self._destino_montado = None
+
+        # As telas de login, registro e home são construídas só quando
+        # usadas pela primeira vez (veja as propriedades visual_*).
+        self._visual_login = None
+        self._visual_registro = None
+        self._visual_home = None
 
         self._build_components()
 
+    # Lista de usuários atual, vinda do cache compartilhado.
+    @property
+    def usuarios(self):
+        if self.cache_usuarios is None:
+            return carregar_usuarios()
+        return self.cache_usuarios.usuarios()
+
+    # Força a releitura dos usuários (lista e índice por email).
+    def recarregar_usuarios(self):
+        if self.cache_usuarios is not None:
+            self.cache_usuarios.recarregar()
+
     # -----------------------------------------------------------
     #MÉTODOS DE CONSTRUÇÃO DE UI (HELPERS)
     # -----------------------------------------------------------
@@ -74,7 +277,7 @@ class AcademiaApp:
                         [
                             ft.Column(
                                 [
-                                    ft.Image(src="assets/logfit.png", width=200, height=200),
+                                    ft.Image(src=caminho_imagem("assets/logfit.png", 200, 200), width=200, height=200),
                                     ft.Text("Espaço Fitness Academia", size=30, weight=ft.FontWeight.BOLD),
                                 ] + controls + [],
                                 spacing=10,
@@ -123,16 +326,10 @@ class AcademiaApp:
     #CONSTRUTOR PRINCIPAL DE COMPONENTES
     # -----------------------------------------------------------
 
-    # Cria e armazena todas as "peças" reutilizáveis da UI (campos, botões, etc).
+    # Cria as "peças" reutilizáveis da UI compartilhadas pelas telas
+    # principais (cabeçalho e menu lateral). As telas em si são
+    # construídas sob demanda pelos métodos _build_*_view abaixo.
     def _build_components(self):
-        # --- Definição dos campos de autenticação ---
-        self.email_campo = ft.TextField(label="Email", width=300)
-        self.senha_campo = ft.TextField(label="Senha", password=True, can_reveal_password=True, width=300)
-        self.campo_nome_reg = ft.TextField(label="Nome Completo", width=300)
-        self.campo_email_reg = ft.TextField(label="Email", width=300)
-        self.campo_senha_reg = ft.TextField(label="Senha", password=True, can_reveal_password=True, width=300)
-        self.campo_confirmar_senha_reg = ft.TextField(label="Confirmar Senha", password=True, can_reveal_password=True, width=300)
-
         # --- Definição dos componentes principais (reutilizados) ---
         self.cabecalho = ft.Row(
             [
@@ -148,11 +345,100 @@ class AcademiaApp:
             destinations=[
                 ft.NavigationRailDestination(icon=ft.Icons.HOME_OUTLINED, selected_icon=ft.Icons.HOME, label="Início"),
                 ft.NavigationRailDestination(icon=ft.Icons.TIMER_OUTLINED, selected_icon=ft.Icons.TIMER, label="Cronômetro"),
+                ft.NavigationRailDestination(icon=ft.Icons.INSIGHTS_OUTLINED, selected_icon=ft.Icons.INSIGHTS, label="Análises"),
             ],
-            on_change=lambda e: self.navegar_para(["home", "cronome"][e.control.selected_index])
+            on_change=lambda e: self.navegar_para(self._destinos[e.control.selected_index])
         )
+        self._destinos = ["home", "cronome", "analises"]
+
+    # Administradores ganham os destinos "Membros" e "Métricas" no menu
+    # lateral.
+    def _ajustar_destinos_admin(self):
+        admin = bool(self.usuario_atual) and normalizar_email(self.usuario_atual["email"]) in ADMINS
+        if admin == ("metricas" in self._destinos):
+            return
+        if admin:
+            self._destinos += ["membros", "metricas"]
+            self.barra_navegacao.destinations += [
+                ft.NavigationRailDestination(icon=ft.Icons.PEOPLE_OUTLINE, selected_icon=ft.Icons.PEOPLE, label="Membros"),
+                ft.NavigationRailDestination(icon=ft.Icons.SPEED_OUTLINED, selected_icon=ft.Icons.SPEED, label="Métricas"),
+            ]
+        else:
+            del self._destinos[-2:]
+            del self.barra_navegacao.destinations[-2:]
+
+    # -----------------------------------------------------------
+    # CONSTRUÇÃO SOB DEMANDA DAS TELAS (VIEWS)
+    # Cada tela é criada no primeiro acesso à propriedade visual_*
+    # correspondente e reaproveitada daí em diante.
+    # -----------------------------------------------------------
+
+    # Executa o construtor de uma tela, medindo o tempo se o modo de
+    # diagnóstico de inicialização estiver ligado.
+    def _construir_tela(self, nome: str, construtor) -> ft.View:
+        inicio = time.perf_counter()
+        tela = construtor()
+        registrar_tempo_inicio(f"construção da tela {nome}", time.perf_counter() - inicio)
+        return tela
 
-        # --- Definição do CONTEÚDO da tela Home ---
+    @property
+    def visual_login(self) -> ft.View:
+        if self._visual_login is None:
+            self._visual_login = self._construir_tela("login", self._build_login_view)
+        return self._visual_login
+
+    @property
+    def visual_registro(self) -> ft.View:
+        if self._visual_registro is None:
+            self._visual_registro = self._construir_tela("registro", self._build_register_view)
+        return self._visual_registro
+
+    @property
+    def visual_home(self) -> ft.View:
+        if self._visual_home is None:
+            self._visual_home = self._construir_tela("home", self._build_home_view)
+        return self._visual_home
+
+    # --- TELA 1: LOGIN ---
+    def _build_login_view(self) -> ft.View:
+        self.email_campo = ft.TextField(label="Email", width=300)
+        self.senha_campo = ft.TextField(label="Senha", password=True, can_reveal_password=True, width=300)
+        self.manter_conectado_check = ft.Checkbox(label="Manter conectado", value=False)
+
+        return self._build_auth_view(
+            route="/login",
+            controls=[
+                ft.Text("Entre na sua conta", size=16),
+                self.email_campo,
+                self.senha_campo,
+                self.manter_conectado_check,
+                ft.ElevatedButton("Entrar", on_click=self.login, width=300),
+                ft.TextButton("Criar uma conta", on_click=self.ir_para_registro),
+            ]
+        )
+
+    # --- TELA 2: REGISTRO ---
+    def _build_register_view(self) -> ft.View:
+        self.campo_nome_reg = ft.TextField(label="Nome Completo", width=300)
+        self.campo_email_reg = ft.TextField(label="Email", width=300)
+        self.campo_senha_reg = ft.TextField(label="Senha", password=True, can_reveal_password=True, width=300)
+        self.campo_confirmar_senha_reg = ft.TextField(label="Confirmar Senha", password=True, can_reveal_password=True, width=300)
+
+        return self._build_auth_view(
+            route="/register",
+            controls=[
+                ft.Text("Crie sua conta", size=16),
+                self.campo_nome_reg,
+                self.campo_email_reg,
+                self.campo_senha_reg,
+                self.campo_confirmar_senha_reg,
+                ft.ElevatedButton("Cadastrar", on_click=self.registrar, width=300),
+                ft.TextButton("Já tem uma conta? Entre", on_click=self.ir_para_login),
+            ]
+        )
+
+    # --- TELA 3: HOME ---
+    def _build_home_view(self) -> ft.View:
         # (Os campos de texto são salvos em 'self' para serem atualizados no login)
         self.texto_usuario_home = ft.Text(f"Usuário: Convidado")
         self.conteudo_home = ft.Column(
@@ -177,7 +463,7 @@ class AcademiaApp:
                                 ft.Card(
                                     content=ft.Container(
                                         content=ft.Column([
-                                            ft.Image(src="assets/turma_malhando.jpeg", width=300, height=200, border_radius=ft.border_radius.all(10)),
+                                            ft.Image(src=caminho_imagem("assets/turma_malhando.jpeg", 300, 200), width=300, height=200, border_radius=ft.border_radius.all(10)),
                                             ft.Text("Novas turmas abertas!", weight=ft.FontWeight.BOLD),
                                             ft.Text("Confira nossas novas aulas em grupo")
                                         ]),
@@ -198,7 +484,7 @@ class AcademiaApp:
                                 ft.Card(
                                     content=ft.Container(
                                         content=ft.Column([
-                                            ft.Image(src="assets/andreia.jpeg", width=300, height=200, border_radius=ft.border_radius.all(10)),
+                                            ft.Image(src=caminho_imagem("assets/andreia.jpeg", 300, 200), width=300, height=200, border_radius=ft.border_radius.all(10)),
                                             ft.Text("Personal Trainer", weight=ft.FontWeight.BOLD),
                                             ft.Text("Agende sua avaliação gratuita")
                                         ]),
@@ -219,93 +505,130 @@ class AcademiaApp:
             spacing=20,
             horizontal_alignment=ft.CrossAxisAlignment.CENTER
         )
-        
-        # -----------------------------------------------------------
-        # INÍCIO DAS DEFINIÇÕES DE TELAS (VIEWS)
-        # -----------------------------------------------------------
 
-        # --- TELA 1: LOGIN ---
-        self.visual_login = self._build_auth_view(
-            route="/login",
-            controls=[
-                ft.Text("Entre na sua conta", size=16),
-                self.email_campo,
-                self.senha_campo,
-                ft.ElevatedButton("Entrar", on_click=self.login, width=300),
-                ft.TextButton("Criar uma conta", on_click=self.ir_para_registro),
-            ]
-        )
-        
-        # --- TELA 2: REGISTRO ---
-        self.visual_registro = self._build_auth_view(
-            route="/register",
-            controls=[
-                ft.Text("Crie sua conta", size=16),
-                self.campo_nome_reg,
-                self.campo_email_reg,
-                self.campo_senha_reg,
-                self.campo_confirmar_senha_reg,
-                ft.ElevatedButton("Cadastrar", on_click=self.registrar, width=300),
-                ft.TextButton("Já tem uma conta? Entre", on_click=self.ir_para_login),
-            ]
-        )
-
-        # --- TELA 3: HOME ---
-        self.visual_home = self._build_main_view("/home", self.conteudo_home)
+        return self._build_main_view("/home", self.conteudo_home)
 
     # -----------------------------------------------------------
     #MÉTODOS DE LÓGICA E CONTROLE (EVENT HANDLERS)
     # -----------------------------------------------------------
 
-    # Ponto de entrada do app: exibe a tela de login inicial.
+    # Ponto de entrada do app: exibe a tela de login inicial, ou a home
+    # direto se a sessão do "Manter conectado" já foi restaurada.
     def start(self):
-        self.page.views.clear()
-        self.page.views.append(self.visual_login)
-        self.page.update()
+        if self.usuario_logado:
+            self.atualizar_interface()
+        else:
+            self.page.views.clear()
+            self.page.views.append(self.visual_login)
+            self.atualizador.atualizar()
+        registrar_tempo_inicio("importação dos módulos", _TEMPO_IMPORTACAO)
+        registrar_tempo_inicio("sessão até o primeiro page.update()", time.perf_counter() - self._inicio_sessao)
+
+    # Procura o token do "Manter conectado" guardado no navegador e, se
+    # a sessão ainda for válida, entra direto, sem consultar os usuários
+    # nem verificar a senha. Chamado antes do start().
+    async def restaurar_sessao(self) -> bool:
+        try:
+            token = await self.page.client_storage.get_async(CHAVE_TOKEN_SESSAO)
+        except Exception:
+            return False
+        if not token:
+            return False
+        try:
+            sessao = await asyncio.to_thread(self.sessoes.validar, token)
+        except Exception as erro:
+            print(f"[sessoes] token descartado: {erro!r}")
+            sessao = None
+        if sessao is None:
+            # Token vencido, revogado, forjado ou ilegível: não adianta
+            # guardá-lo (e um token ruim não pode quebrar toda recarga).
+            try:
+                await self.page.client_storage.remove_async(CHAVE_TOKEN_SESSAO)
+            except Exception:
+                pass
+            return False
+        self.usuario_logado = True
+        self.usuario_atual = sessao
+        self.token_sessao = token
+        return True
+
+    # Sessão encerrada pelo Flet: para os cronômetros e a instrumentação.
+    def _ao_fechar_sessao(self, e):
+        self._descartar_telas_principais()
+        self.atualizador.encerrar()
 
     # Valida as credenciais e faz o login do usuário.
-    def login(self, e):
+    # Tudo o que o handler altera vai ao navegador em um único envio.
+    # A verificação da senha (hash lento de propósito) roda no pool de
+    # senhas, sem travar o loop de eventos.
+    @acao_do_usuario("login")
+    async def login(self, e):
         self.email_campo.error_text = None
         self.senha_campo.error_text = None
-        self.page.update()
         email = self.email_campo.value.strip()
         senha = self.senha_campo.value.strip()
         if not email:
             self.email_campo.error_text = "O campo de email não pode estar vazio"
         if not senha:
             self.senha_campo.error_text = "O campo de senha não pode estar vazio"
-        self.page.update()
+        self.atualizador.atualizar(self.email_campo, self.senha_campo)
         if self.email_campo.error_text or self.senha_campo.error_text:
             return
-        
-        usuario = next((u for u in self.usuarios if u["email"] == email and u["password"] == senha), None)
-        
+
+        # Tentativas demais: recusa antes de qualquer consulta ou hash.
+        espera = await asyncio.to_thread(tentativa_de_login, self.page.client_ip or self.page.session_id, email)
+        if espera:
+            self.senha_campo.error_text = f"Muitas tentativas. Tente novamente em {math.ceil(espera)} s."
+            self.atualizador.atualizar(self.senha_campo)
+            return
+
+        # Consulta no índice por email (sem diferenciar maiúsculas), numa
+        # thread: uma recarga do cache ou o SQLite não travam o loop.
+        # Emails inexistentes também passam por uma verificação, para
+        # que o tempo de resposta não revele quem está cadastrado.
+        usuario = await asyncio.to_thread(buscar_usuario, email)
+        confere, precisa_rehash = await verificar_senha_async(senha, usuario["password"] if usuario else None)
+        if not confere:
+            usuario = None
+        elif precisa_rehash:
+            # Senha legada (texto puro) ou custo antigo: grava o hash novo.
+            novo_hash = await gerar_hash_senha_async(senha)
+            await asyncio.to_thread(atualizar_senha_usuario, usuario["email"], novo_hash)
+
         if usuario:
             self.usuario_logado = True
             self.usuario_atual = usuario
+            if self.manter_conectado_check.value:
+                self.token_sessao = await asyncio.to_thread(self.sessoes.criar, usuario["email"], usuario["nome"])
+                await self.page.client_storage.set_async(CHAVE_TOKEN_SESSAO, self.token_sessao)
             self.page.snack_bar = ft.SnackBar(ft.Text(f"Bem-vindo, {usuario['nome']}!", color=ft.Colors.WHITE), bgcolor=ft.Colors.GREEN_700)
             self.page.snack_bar.open = True
             self.atualizar_interface()
         else:
             self.email_campo.error_text = "Email ou senha incorretos."
             self.senha_campo.error_text = "Email ou senha incorretos."
-            self.page.update()
+            self.atualizador.atualizar(self.email_campo, self.senha_campo)
 
     # Desconecta o usuário e o envia para a tela de login.
+    @acao_do_usuario("logout")
     def logout(self, e):
         self.usuario_logado = False
         self.usuario_atual = None
+        if self.token_sessao is not None:
+            self.sessoes.revogar(self.token_sessao)
+            self.page.client_storage.remove(CHAVE_TOKEN_SESSAO)
+            self.token_sessao = None
+        self._descartar_telas_principais()
         self.page.snack_bar = ft.SnackBar(ft.Text("Logout realizado com sucesso!", color=ft.Colors.WHITE), bgcolor=ft.Colors.GREEN_700)
         self.page.snack_bar.open = True
         self.atualizar_interface()
 
     # Valida os dados e cria um novo usuário.
-    def registrar(self, e):
-        self.campo_nome_reg.error_text = None
-        self.campo_email_reg.error_text = None
-        self.campo_senha_reg.error_text = None
-        self.campo_confirmar_senha_reg.error_text = None
-        self.page.update()
+    @acao_do_usuario("registrar")
+    async def registrar(self, e):
+        campos = (self.campo_nome_reg, self.campo_email_reg, self.campo_senha_reg, self.campo_confirmar_senha_reg)
+        for campo in campos:
+            campo.error_text = None
 
         nome = self.campo_nome_reg.value.strip()
         email = self.campo_email_reg.value.strip()
@@ -319,7 +642,7 @@ class AcademiaApp:
         if not email:
             self.campo_email_reg.error_text = "O campo de email não pode estar vazio."
             erro = True
-        elif any(u["email"] == email for u in self.usuarios):
+        elif await asyncio.to_thread(buscar_usuario, email) is not None:
             self.campo_email_reg.error_text = "Email já cadastrado."
             erro = True
         if not senha:
@@ -331,13 +654,20 @@ class AcademiaApp:
         elif senha != confirmar_senha:
             self.campo_confirmar_senha_reg.error_text = "As senhas não coincidem."
             erro = True
-        
-        self.page.update()
+
+        self.atualizador.atualizar(*campos)
         if erro:
             return
 
-        self.usuarios.append({"nome": nome, "email": email, "password": senha})
-        salvar_usuarios(self.usuarios)
+        # Só o hash da senha (com sal próprio) é guardado.
+        novo_usuario = {"nome": nome, "email": email, "password": await gerar_hash_senha_async(senha)}
+        # A inserção é atômica no repositório; se outra sessão cadastrou
+        # o mesmo email nesse meio-tempo, ela é recusada aqui. O cache
+        # compartilhado já fica atualizado para todas as sessões.
+        if not await asyncio.to_thread(adicionar_usuario, novo_usuario):
+            self.campo_email_reg.error_text = "Email já cadastrado."
+            self.atualizador.atualizar(self.campo_email_reg)
+            return
         self.page.snack_bar = ft.SnackBar(ft.Text("Cadastro realizado com sucesso! Faça login.", color=ft.Colors.WHITE), bgcolor=ft.Colors.GREEN_700)
         self.page.snack_bar.open = True
 
@@ -348,55 +678,129 @@ class AcademiaApp:
         
         self.page.views.clear()
         self.page.views.append(self.visual_login)
-        self.page.update()
+        self.atualizador.atualizar()
 
     # Navega para a tela de Registro.
+    @acao_do_usuario("ir_para_registro")
     def ir_para_registro(self, e):
         self.page.views.clear()
         self.page.views.append(self.visual_registro)
-        self.page.update()
+        self.atualizador.atualizar()
 
     # Navega para a tela de Login.
+    @acao_do_usuario("ir_para_login")
     def ir_para_login(self, e):
         self.page.views.clear()
         self.page.views.append(self.visual_login)
-        self.page.update()
+        self.atualizador.atualizar()
 
     # Abre o link do WhatsApp no navegador.
     def abrir_whatsapp(self, e: ft.ControlEvent):
         link = f"https://wa.me/{NUMERO_WHATSAPP}"
         self.page.launch_url(link)
 
-    # Controla a navegação principal, exibindo a tela correta com base no destino.
-    def navegar_para(self, destino: str):
-        self.page.views.clear()
+    # Constrói a tela principal de um destino. Chamado apenas uma vez
+    # por sessão para cada destino; o resultado fica em cache.
+    def _construir_tela_principal(self, destino: str) -> ft.View:
         if destino == "home":
-            self.page.views.append(self.visual_home)
-        
+            return self.visual_home
+
         elif destino == "cronome":
-            cronometro_app = CronometroApp(self.page)
+            cronometro_app = CronometroApp(self.page, atualizador=self.atualizador,
+                                           email_usuario=self.usuario_atual["email"] if self.usuario_atual else None)
+            self._componentes[destino] = cronometro_app
             conteudo_cronometro = ft.Column([
                 ft.Text("Cronômetro", size=24, weight=ft.FontWeight.BOLD),
                 cronometro_app.build()
             ], spacing=20)
-            visual_cronometro = self._build_main_view("/cronometro", conteudo_cronometro)
-            self.page.views.append(visual_cronometro)
-            
-        self.page.update()
+            return self._build_main_view("/cronometro", conteudo_cronometro)
+
+        elif destino == "analises":
+            painel = PainelAnalises(self.usuario_atual["email"] if self.usuario_atual else None)
+            self._componentes[destino] = painel
+            conteudo_analises = ft.Column([
+                ft.Text("Análises", size=24, weight=ft.FontWeight.BOLD),
+                painel.build()
+            ], spacing=20)
+            return self._build_main_view("/analises", conteudo_analises)
+
+        elif destino == "membros":
+            painel = PainelMembros(self.atualizador)
+            self._componentes[destino] = painel
+            conteudo_membros = ft.Column([
+                ft.Text("Membros", size=24, weight=ft.FontWeight.BOLD),
+                painel.build()
+            ], spacing=20)
+            return self._build_main_view("/admin/membros", conteudo_membros)
+
+        elif destino == "metricas":
+            painel = PainelMetricas(self.atualizador)
+            self._componentes[destino] = painel
+            conteudo_metricas = ft.Column([
+                ft.Text("Métricas", size=24, weight=ft.FontWeight.BOLD),
+                painel.build()
+            ], spacing=20)
+            return self._build_main_view("/admin/metricas", conteudo_metricas)
+
+        raise ValueError(f"Destino desconhecido: {destino}")
+
+    # Retorna a View do destino, reaproveitando a que já foi construída.
+    def _obter_tela_principal(self, destino: str) -> ft.View:
+        if destino not in self._telas_principais:
+            self._telas_principais[destino] = self._construir_tela_principal(destino)
+        return self._telas_principais[destino]
+
+    # Avisa o componente da tela que está saindo que ele não está mais
+    # visível (ele pausa suas tarefas de fundo).
+    def _desmontar_destino_atual(self):
+        componente = self._componentes.get(self._destino_montado)
+        if componente is not None:
+            componente.ao_desmontar()
+        self._destino_montado = None
+
+    # Encerra todos os componentes e esquece as telas em cache (no logout,
+    # para que o próximo usuário não herde o cronômetro do anterior).
+    def _descartar_telas_principais(self):
+        self._desmontar_destino_atual()
+        for componente in self._componentes.values():
+            componente.encerrar()
+        self._componentes.clear()
+        self._telas_principais.clear()
+
+    # Controla a navegação principal, exibindo a tela correta com base no destino.
+    # As telas são construídas uma única vez e depois apenas trocadas.
+    @acao_do_usuario("navegar_para")
+    def navegar_para(self, destino: str):
+        self._desmontar_destino_atual()
+        self.page.views.clear()
+        self.page.views.append(self._obter_tela_principal(destino))
+        self.atualizador.atualizar()
+
+        self._destino_montado = destino
+        componente = self._componentes.get(destino)
+        if componente is not None:
+            componente.ao_montar()
 
     # Atualiza a UI inteira com base no estado de login (logado ou deslogado).
+    @medir("atualizar_interface")
     def atualizar_interface(self):
+        self._desmontar_destino_atual()
         self.page.views.clear()
+        self._ajustar_destinos_admin()
         if self.usuario_logado:
+            visual_home = self.visual_home
             self.texto_usuario_home.value = f"Usuário: {self.usuario_atual['nome']}"
             self.barra_navegacao.selected_index = 0
-            self.page.views.append(self.visual_home)
+            self.page.views.append(visual_home)
         else:
-            self.texto_usuario_home.value = "Usuário: Convidado"
+            if self._visual_home is not None:
+                self.texto_usuario_home.value = "Usuário: Convidado"
+            visual_login = self.visual_login
             self.email_campo.value = ""
             self.senha_campo.value = ""
-            self.page.views.append(self.visual_login)
-        self.page.update()
+            self.manter_conectado_check.value = False
+            self.page.views.append(visual_login)
+        self.atualizador.atualizar()
 
 # ===================================================================
 # CLASSE DO COMPONENTE CRONÔMETRO 
@@ -405,19 +809,57 @@ class AcademiaApp:
 # ===================================================================
 
 class CronometroApp:
-    def __init__(self, page):
+    VOLTAS_EXIBIDAS = 5
+
+    def __init__(self, page, modo_render: str = MODO_RENDER_CRONOMETRO,
+                 atualizador: AtualizadorPagina = None, email_usuario: str = None,
+                 agendador: AgendadorCronometros = None):
         self.page = page
-        self.tempo_inicial = None
-        self.rodando = False
+        self.atualizador = atualizador or AtualizadorPagina(page)
+        self.agendador = agendador if agendador is not None else agendador_cronometros
+        self.cronometro = Cronometro()
         self.repeticao_atual = 0
 
+        # Membro dono das séries; cada série parada é gravada no histórico
+        # dele (início em horário real, duração e repetições). O contador
+        # de repetições não zera entre séries, então as repetições da
+        # série são a diferença desde o valor que ele tinha no início.
+        self.email_usuario = email_usuario
+        self.inicio_serie = None
+        self.repeticoes_no_inicio = 0
+
+        # --- Configuração da renderização do tempo ---
+        self.modo_render = modo_render
+        self.visivel = True
+        self._inscrito = False
+        self._programa_concluido = False
+        # Quadros que chegaram a mudar algum texto (e foram enviados).
+        self.quadros_renderizados = 0
+
         self.texto_tempo = ft.Text("Tempo Decorrido: 00:00.00", size=18, weight=ft.FontWeight.BOLD)
+        self.texto_fase = ft.Text("", size=16, visible=False)
+        self.seletor_programa = ft.Dropdown(
+            label="Programa",
+            width=260,
+            value="livre",
+            options=[ft.dropdown.Option(chave, programa.nome if programa else "Livre")
+                     for chave, programa in PROGRAMAS_INTERVALO.items()],
+            on_change=self.escolher_programa,
+        )
         self.btn_iniciar = ft.ElevatedButton("Iniciar/Reiniciar", icon=ft.Icons.PLAY_ARROW, on_click=self.iniciar_cronometro)
+        self.btn_pausar = ft.ElevatedButton("Pausar", icon=ft.Icons.PAUSE, on_click=self.pausar_cronometro, disabled=True)
+        self.btn_volta = ft.ElevatedButton("Volta", icon=ft.Icons.FLAG, on_click=self.marcar_volta, disabled=True)
         self.btn_parar = ft.ElevatedButton("Parar", icon=ft.Icons.STOP, on_click=self.parar_cronometro)
+        self.coluna_voltas = ft.Column(spacing=2, horizontal_alignment=ft.CrossAxisAlignment.CENTER)
         self.texto_repeticao = ft.Text(f"Repetição: {self.repeticao_atual}", size=16)
         self.btn_adicionar = ft.ElevatedButton("+", on_click=self.adc_repeticao)
         self.btn_remover = ft.ElevatedButton("-", on_click=self.sub_repeticao)
 
+    # Compatibilidade: o treino está em andamento (mesmo que pausado).
+    @property
+    def rodando(self) -> bool:
+        return self.cronometro.rodando
+
     def build(self):
         conteudo = ft.Column(
             [
@@ -428,13 +870,17 @@ class CronometroApp:
                                 ft.Icon(ft.Icons.TIMER, size=60, color=ft.Colors.BLUE),
                                 ft.Text("Treino em andamento", size=18, weight=ft.FontWeight.BOLD),
                                 self.texto_tempo,
+                                self.texto_fase,
+                                self.seletor_programa,
                                 ft.Divider(),
                                 ft.Text("Controles", size=16, weight=ft.FontWeight.BOLD),
                                 ft.Row(
-                                    [self.btn_iniciar, self.btn_parar],
+                                    [self.btn_iniciar, self.btn_pausar, self.btn_volta, self.btn_parar],
                                     alignment=ft.MainAxisAlignment.CENTER,
-                                    spacing=20
+                                    wrap=True,
+                                    spacing=10
                                 ),
+                                self.coluna_voltas,
                                 ft.Divider(),
                                 ft.Text("Gerenciar Repetições", size=16, weight=ft.FontWeight.BOLD),
                                 self.texto_repeticao,
@@ -464,41 +910,479 @@ class CronometroApp:
             alignment=ft.alignment.center,
         )
 
+    # --- Controles do treino ---
+
+    @acao_do_usuario("cronometro.programa")
+    def escolher_programa(self, e):
+        self.cronometro.programa = PROGRAMAS_INTERVALO.get(self.seletor_programa.value)
+        self._programa_concluido = False
+        self.renderizar_tempo()
+
+    @acao_do_usuario("cronometro.iniciar")
     def iniciar_cronometro(self, e):
         if not self.rodando:
-            self.tempo_inicial = time.time()
-            self.rodando = True
-            self.page.run_task(self.atualizar_loop)
+            self.cronometro.iniciar()
+            self.inicio_serie = time.time()
+            self.repeticoes_no_inicio = self.repeticao_atual
+            self._programa_concluido = False
+            self.coluna_voltas.controls = []
+            self._atualizar_botoes()
+            self.atualizador.atualizar(self.coluna_voltas)
+            self._sincronizar_agendador()
+
+    @acao_do_usuario("cronometro.pausar")
+    def pausar_cronometro(self, e):
+        if not self.rodando:
+            return
+        if self.cronometro.pausado:
+            self.cronometro.retomar()
+        else:
+            self.cronometro.pausar()
+        self._sincronizar_agendador()
+        self._atualizar_botoes()
+        self.renderizar_tempo()
+
+    @acao_do_usuario("cronometro.volta")
+    def marcar_volta(self, e):
+        if not self.rodando:
+            return
+        parcial = self.cronometro.volta()
+        self.coluna_voltas.controls.insert(0, ft.Text(
+            f"Volta {len(self.cronometro.voltas)}: {self._formatar(parcial)} (total {self._formatar(self.cronometro.voltas[-1])})"))
+        del self.coluna_voltas.controls[self.VOLTAS_EXIBIDAS:]
+        self.atualizador.atualizar(self.coluna_voltas)
 
+    @acao_do_usuario("cronometro.parar")
     def parar_cronometro(self, e):
         if self.rodando:
-            self.rodando = False
+            duracao = self.cronometro.parar()
+            self._sincronizar_agendador()
+            self._atualizar_botoes()
+            self.renderizar_tempo()
             self.adc_repeticao(None)
+            if self.email_usuario:
+                repeticoes = max(0, self.repeticao_atual - self.repeticoes_no_inicio)
+                registrar_serie(self.email_usuario, self.inicio_serie, duracao, repeticoes)
+
+    def _atualizar_botoes(self):
+        pausado = self.cronometro.pausado
+        self.btn_pausar.disabled = not self.rodando
+        self.btn_pausar.text = "Retomar" if pausado else "Pausar"
+        self.btn_pausar.icon = ft.Icons.PLAY_ARROW if pausado else ft.Icons.PAUSE
+        self.btn_volta.disabled = not self.rodando or pausado
+        self.seletor_programa.disabled = self.rodando
+        self.atualizador.atualizar(self.btn_pausar, self.btn_volta, self.seletor_programa)
+
+    # Inscreve o cronômetro no agendador só enquanto ele estiver
+    # rodando, sem pausa e na tela; fora disso ele não custa nada.
+    def _sincronizar_agendador(self):
+        deve_inscrever = self.rodando and not self.cronometro.pausado and self.visivel
+        if deve_inscrever == self._inscrito:
+            return
+        self._inscrito = deve_inscrever
+        if deve_inscrever:
+            self.atualizador.iniciar_tarefa("cronometro")
+            self.agendador.inscrever(self, self.page)
+        else:
+            self.agendador.cancelar(self)
+            self.atualizador.encerrar_tarefa("cronometro")
+
+    # Informa se o cronômetro está na tela. Escondido, ele sai do
+    # agendador e não envia nada ao navegador.
+    def definir_visivel(self, visivel: bool):
+        self.visivel = visivel
+        self._sincronizar_agendador()
+
+    # --- Ciclo de vida (chamado pelo AcademiaApp na navegação) ---
+
+    # A tela voltou a ser exibida: redesenha o tempo atual e, se o treino
+    # estava rodando, volta ao agendador (o tempo continua contando
+    # desde o início, descontadas as pausas).
+    def ao_montar(self):
+        self.definir_visivel(True)
+        self.renderizar_tempo()
+
+    # A tela saiu de cena: sai do agendador, mas mantém o estado do
+    # treino (tempo, voltas e repetições) para quando voltar.
+    def ao_desmontar(self):
+        self.definir_visivel(False)
+
+    # Para o cronômetro de vez (a tela será descartada).
+    def encerrar(self):
+        self.cronometro.parar()
+        self._sincronizar_agendador()
 
-    async def atualizar_loop(self):
-        while self.rodando:
-            tempo_decorrido = time.time() - self.tempo_inicial
-            minutos = int(tempo_decorrido // 60)
-            segundos = tempo_decorrido % 60
-            self.texto_tempo.value = f"Tempo Decorrido: {minutos:02d}:{segundos:05.2f}"
-            self.page.update()
-            await asyncio.sleep(0.01)
+    # --- Renderização ---
 
+    @staticmethod
+    def _formatar(segundos: float) -> str:
+        minutos = int(segundos // 60)
+        return f"{minutos:02d}:{segundos % 60:05.2f}"
+
+    # Atualiza os textos com base no relógio monotônico (o valor exibido
+    # é sempre exato, mesmo que algum tick atrase) e pede o envio só dos
+    # que mudaram. Retorna True se algo mudou.
+    def quadro(self, agora: float = None) -> bool:
+        decorrido = self.cronometro.decorrido(agora)
+        mudaram = []
+        texto_tempo = f"Tempo Decorrido: {self._formatar(decorrido)}"
+        if texto_tempo != self.texto_tempo.value:
+            self.texto_tempo.value = texto_tempo
+            mudaram.append(self.texto_tempo)
+
+        programa = self.cronometro.programa
+        texto_fase = ""
+        if programa is not None:
+            if self._programa_concluido:
+                texto_fase = f"{programa.nome}: concluído!"
+            elif not self.rodando:
+                texto_fase = programa.nome
+            else:
+                fase, rodada, restante = programa.fase(decorrido)
+                texto_fase = f"{fase.capitalize()} · rodada {rodada}/{programa.rodadas} · faltam {math.ceil(restante)} s"
+        if texto_fase != self.texto_fase.value or self.texto_fase.visible != bool(texto_fase):
+            self.texto_fase.value = texto_fase
+            self.texto_fase.visible = bool(texto_fase)
+            mudaram.append(self.texto_fase)
+
+        if mudaram and self.visivel:
+            if self.modo_render == "pagina":
+                self.atualizador.atualizar()
+            else:
+                self.atualizador.atualizar(*mudaram)
+            self.quadros_renderizados += 1
+
+        # Programa concluído: encerra a série como se o membro tivesse
+        # clicado em "Parar".
+        if self.cronometro.terminou(agora):
+            self._programa_concluido = True
+            self.parar_cronometro(None)
+        return bool(mudaram)
+
+    def renderizar_tempo(self):
+        return self.quadro()
+
+    # O contador de repetições só atualiza o próprio texto, não a página.
+    @acao_do_usuario("cronometro.repeticao")
     def adc_repeticao(self, e):
         self.repeticao_atual += 1
         self.texto_repeticao.value = f"Repetição: {self.repeticao_atual}"
-        self.page.update()
+        self.atualizador.atualizar(self.texto_repeticao)
 
+    @acao_do_usuario("cronometro.repeticao")
     def sub_repeticao(self, e):
         if self.repeticao_atual > 0:
             self.repeticao_atual -= 1
             self.texto_repeticao.value = f"Repetição: {self.repeticao_atual}"
-            self.page.update()
+            self.atualizador.atualizar(self.texto_repeticao)
+
+# ===================================================================
+# CLASSE DO PAINEL DE ANÁLISES
+# Mostra as métricas do histórico de treinos do membro (módulo
+# analise_treinos). Os números são recalculados ao abrir a tela,
+# mas o módulo devolve o resultado memoizado se não houver séries
+# novas desde a última vez.
+# ===================================================================
+
+class PainelAnalises:
+    SEMANAS_EXIBIDAS = 8
+
+    def __init__(self, email_usuario: str):
+        self.email_usuario = email_usuario
+
+        self.texto_series = ft.Text("-", size=20, weight=ft.FontWeight.BOLD)
+        self.texto_repeticoes = ft.Text("-", size=20, weight=ft.FontWeight.BOLD)
+        self.texto_duracao = ft.Text("-", size=20, weight=ft.FontWeight.BOLD)
+        self.texto_volume = ft.Text("-", size=20, weight=ft.FontWeight.BOLD)
+        self.coluna_descansos = ft.Column(spacing=5)
+        self.tabela_semanas = ft.DataTable(
+            columns=[
+                ft.DataColumn(ft.Text("Semana")),
+                ft.DataColumn(ft.Text("Séries"), numeric=True),
+                ft.DataColumn(ft.Text("Repetições"), numeric=True),
+                ft.DataColumn(ft.Text("Tempo (min)"), numeric=True),
+            ],
+        )
+
+    # Card pequeno com um indicador (título + valor).
+    def _indicador(self, titulo: str, texto_valor: ft.Text) -> ft.Control:
+        return ft.Card(
+            content=ft.Container(
+                content=ft.Column([ft.Text(titulo, size=14), texto_valor], spacing=5),
+                padding=15,
+                width=180,
+            )
+        )
+
+    def build(self):
+        return ft.Column(
+            [
+                ft.Row(
+                    [
+                        self._indicador("Séries", self.texto_series),
+                        self._indicador("Repetições", self.texto_repeticoes),
+                        self._indicador("Duração média", self.texto_duracao),
+                        self._indicador("Volume (7 dias)", self.texto_volume),
+                    ],
+                    wrap=True,
+                    spacing=10,
+                ),
+                ft.Text("Descanso entre séries", size=16, weight=ft.FontWeight.BOLD),
+                self.coluna_descansos,
+                ft.Text("Últimas semanas", size=16, weight=ft.FontWeight.BOLD),
+                self.tabela_semanas,
+            ],
+            spacing=15,
+        )
+
+    # Preenche os controles com as métricas atuais. O NumPy só é
+    # importado aqui, para não pesar na abertura do app.
+    def atualizar(self):
+        if not self.email_usuario:
+            return
+        from analise_treinos import analisar_membro, volume_recente
+
+        metricas = analisar_membro(self.email_usuario)
+        self.texto_series.value = str(metricas["total_series"])
+        self.texto_repeticoes.value = str(metricas["total_repeticoes"])
+        self.texto_duracao.value = f"{metricas['duracao_media']:.1f} s"
+        self.texto_volume.value = str(volume_recente(metricas))
+
+        descansos = metricas["descansos"]
+        faixas = descansos["faixas"]
+        self.coluna_descansos.controls = [
+            ft.Text(f"{int(faixas[i])}–{int(faixas[i + 1])} s: {int(quantidade)} série(s)")
+            for i, quantidade in enumerate(descansos["contagens"]) if quantidade
+        ] or [ft.Text("Ainda não há descansos registrados.")]
+        if descansos["mediana"]:
+            self.coluna_descansos.controls.append(ft.Text(f"Mediana: {descansos['mediana']:.0f} s"))
+
+        semanas = metricas["semanas"]
+        ultimas = slice(-self.SEMANAS_EXIBIDAS, None)
+        self.tabela_semanas.rows = [
+            ft.DataRow(cells=[
+                ft.DataCell(ft.Text(time.strftime("%d/%m/%Y", time.localtime(inicio)))),
+                ft.DataCell(ft.Text(str(int(series)))),
+                ft.DataCell(ft.Text(str(int(repeticoes)))),
+                ft.DataCell(ft.Text(f"{duracao / 60:.1f}")),
+            ])
+            for inicio, series, repeticoes, duracao in zip(
+                semanas["inicio_semana"][ultimas][::-1], semanas["series"][ultimas][::-1],
+                semanas["repeticoes"][ultimas][::-1], semanas["duracao"][ultimas][::-1])
+        ]
+
+    # --- Ciclo de vida (chamado pelo AcademiaApp na navegação) ---
+    def ao_montar(self):
+        self.atualizar()
+
+    def ao_desmontar(self):
+        pass
+
+    def encerrar(self):
+        pass
+
+# ===================================================================
+# CLASSE DO PAINEL DE MEMBROS (ADMINISTRADORES)
+# Lista os membros cadastrados em ordem alfabética, com busca pelo
+# começo do nome ou do email. Só uma página (MEMBROS_POR_PAGINA) é
+# consultada e enviada ao navegador por vez, e a ListView com altura
+# fixa de item só desenha as linhas visíveis: memória e tempo de
+# renderização não dependem do número de membros.
+# A paginação é por chave (buscar_pagina do repositório): cada página
+# guarda o cursor em que começou, para o "Anterior" voltar a ela.
+# ===================================================================
+
+MEMBROS_POR_PAGINA = 50
+ALTURA_LINHA_MEMBRO = 56
+LINHAS_VISIVEIS_MEMBROS = 10
+
+
+class PainelMembros:
+    def __init__(self, atualizador: AtualizadorPagina):
+        self.atualizador = atualizador
+        # Cursores do início de cada página já vista (None = primeira)
+        # e o cursor da próxima página (None = esta é a última).
+        self._cursores = [None]
+        self._proximo = None
+        # Consultas disparadas enquanto o usuário digita podem terminar
+        # fora de ordem; só a resposta da mais recente é exibida.
+        self._consulta = 0
+        self.campo_busca = ft.TextField(label="Buscar", prefix_icon=ft.Icons.SEARCH, width=300,
+                                        on_change=self.ao_buscar)
+        self.seletor_campo = ft.Dropdown(
+            label="Buscar por", value="nome", width=160,
+            options=[ft.dropdown.Option("nome", "Nome"), ft.dropdown.Option("email", "Email")],
+            on_change=self.ao_buscar,
+        )
+        self.lista = ft.ListView(item_extent=ALTURA_LINHA_MEMBRO,
+                                 height=ALTURA_LINHA_MEMBRO * LINHAS_VISIVEIS_MEMBROS)
+        self.texto_pagina = ft.Text()
+        self.btn_anterior = ft.IconButton(icon=ft.Icons.CHEVRON_LEFT, tooltip="Anterior", on_click=self.pagina_anterior)
+        self.btn_proxima = ft.IconButton(icon=ft.Icons.CHEVRON_RIGHT, tooltip="Próxima", on_click=self.proxima_pagina)
+
+    def build(self):
+        return ft.Column(
+            [
+                ft.Row([self.campo_busca, self.seletor_campo], spacing=10),
+                self.lista,
+                ft.Row([self.btn_anterior, self.texto_pagina, self.btn_proxima],
+                       vertical_alignment=ft.CrossAxisAlignment.CENTER),
+            ],
+            spacing=15,
+        )
+
+    # Consulta a página que começa em 'cursor' e troca o conteúdo da
+    # lista por ela. Os handlers são síncronos: o Flet os executa em
+    # threads, fora do loop de eventos.
+    def _carregar(self, cursor):
+        self._consulta += 1
+        consulta = self._consulta
+        membros, proximo = obter_repositorio().buscar_pagina(
+            self.campo_busca.value or "", self.seletor_campo.value, cursor, MEMBROS_POR_PAGINA)
+        if consulta != self._consulta:
+            return
+        self._proximo = proximo
+        self.lista.controls = [
+            ft.ListTile(leading=ft.Icon(ft.Icons.PERSON), title=ft.Text(membro["nome"]),
+                        subtitle=ft.Text(membro["email"]))
+            for membro in membros
+        ]
+        if not membros:
+            self.lista.controls.append(ft.ListTile(title=ft.Text("Nenhum membro encontrado.")))
+        self.texto_pagina.value = f"Página {len(self._cursores)}"
+        self.btn_anterior.disabled = len(self._cursores) == 1
+        self.btn_proxima.disabled = proximo is None
+        self.atualizador.atualizar(self.lista, self.texto_pagina, self.btn_anterior, self.btn_proxima)
+
+    @acao_do_usuario("membros.buscar")
+    def ao_buscar(self, e):
+        self._cursores = [None]
+        self._carregar(None)
+
+    @acao_do_usuario("membros.proxima")
+    def proxima_pagina(self, e):
+        if self._proximo is None:
+            return
+        self._cursores.append(self._proximo)
+        self._carregar(self._proximo)
+
+    @acao_do_usuario("membros.anterior")
+    def pagina_anterior(self, e):
+        if len(self._cursores) == 1:
+            return
+        self._cursores.pop()
+        self._carregar(self._cursores[-1])
+
+    # --- Ciclo de vida (chamado pelo AcademiaApp na navegação) ---
+    # A lista é recarregada a cada visita, a partir da página atual,
+    # para mostrar os cadastros novos.
+    def ao_montar(self):
+        self._carregar(self._cursores[-1])
+
+    def ao_desmontar(self):
+        pass
+
+    def encerrar(self):
+        pass
+
+# ===================================================================
+# CLASSE DO PAINEL DE MÉTRICAS (ADMINISTRADORES)
+# Mostra as métricas de desempenho do processo (módulo
+# instrumentacao): latência de cada handler, atualizações enviadas,
+# tamanho dos envios e tarefas de fundo ativas por sessão.
+# ===================================================================
+
+class PainelMetricas:
+    def __init__(self, atualizador: AtualizadorPagina):
+        self.atualizador = atualizador
+        self.texto_resumo = ft.Text()
+        self.tabela_handlers = ft.DataTable(
+            columns=[
+                ft.DataColumn(ft.Text("Ação")),
+                ft.DataColumn(ft.Text("Chamadas"), numeric=True),
+                ft.DataColumn(ft.Text("p50 (ms)"), numeric=True),
+                ft.DataColumn(ft.Text("p95 (ms)"), numeric=True),
+                ft.DataColumn(ft.Text("Máx. (ms)"), numeric=True),
+            ],
+        )
+        self.tabela_sessoes = ft.DataTable(
+            columns=[
+                ft.DataColumn(ft.Text("Sessão")),
+                ft.DataColumn(ft.Text("Atualizações"), numeric=True),
+                ft.DataColumn(ft.Text("Bytes"), numeric=True),
+                ft.DataColumn(ft.Text("Tarefas ativas")),
+            ],
+        )
+
+    def build(self):
+        return ft.Column(
+            [
+                self.texto_resumo,
+                ft.ElevatedButton("Atualizar", icon=ft.Icons.REFRESH, on_click=self.ao_clicar_atualizar),
+                ft.Text("Handlers", size=16, weight=ft.FontWeight.BOLD),
+                self.tabela_handlers,
+                ft.Text("Sessões", size=16, weight=ft.FontWeight.BOLD),
+                self.tabela_sessoes,
+            ],
+            spacing=15,
+        )
+
+    def atualizar(self):
+        dados = metricas.instantaneo()
+        if not metricas.ligado:
+            self.texto_resumo.value = ("Instrumentação desligada: inicie o app com "
+                                       "ESPACO_FITNESS_INSTRUMENTACAO=1 para medir os handlers.")
+        else:
+            envios = dados["bytes_por_envio"]
+            self.texto_resumo.value = (f"{dados['atualizacoes']} atualizações enviadas, "
+                                       f"{envios['quantidade']} envios (p50 {envios['p50']:.0f} bytes, "
+                                       f"máx. {envios['maximo']:.0f} bytes), {len(dados['sessoes'])} sessão(ões).")
+        self.tabela_handlers.rows = [
+            ft.DataRow(cells=[
+                ft.DataCell(ft.Text(nome)),
+                ft.DataCell(ft.Text(str(h["quantidade"]))),
+                ft.DataCell(ft.Text(f"{h['p50'] * 1000:.1f}")),
+                ft.DataCell(ft.Text(f"{h['p95'] * 1000:.1f}")),
+                ft.DataCell(ft.Text(f"{h['maximo'] * 1000:.1f}")),
+            ])
+            for nome, h in dados["latencias"].items()
+        ]
+        self.tabela_sessoes.rows = [
+            ft.DataRow(cells=[
+                ft.DataCell(ft.Text(id_sessao[:8])),
+                ft.DataCell(ft.Text(str(sessao["atualizacoes"]))),
+                ft.DataCell(ft.Text(str(sessao["bytes_enviados"]))),
+                ft.DataCell(ft.Text(", ".join(f"{t} ({n})" for t, n in sessao["tarefas_ativas"].items()) or "-")),
+            ])
+            for id_sessao, sessao in dados["sessoes"].items()
+        ]
+
+    @acao_do_usuario("metricas.atualizar")
+    def ao_clicar_atualizar(self, e):
+        self.atualizar()
+        self.atualizador.atualizar(self.texto_resumo, self.tabela_handlers, self.tabela_sessoes)
+
+    # --- Ciclo de vida (chamado pelo AcademiaApp na navegação) ---
+    def ao_montar(self):
+        self.atualizar()
+
+    def ao_desmontar(self):
+        pass
+
+    def encerrar(self):
+        pass
 
 # Função 'main' que o Flet usará como ponto de entrada.
-def main(page: ft.Page):
+# É assíncrona para que a leitura inicial dos usuários (só na primeira
+# sessão do processo) aconteça em uma thread, fora do loop de eventos.
+async def main(page: ft.Page):
+    iniciar_despejo_periodico()
+    await preparar_cache_usuarios_async()
     app = AcademiaApp(page)
+    await app.restaurar_sessao()
     app.start()
 
-# Inicia o aplicativo Flet.
-ft.app(target=main)
\ No newline at end of file
+# Inicia o aplicativo Flet (um único processo). Para vários processos
+# atrás da mesma porta, use o servidor.py.
+if __name__ == "__main__":
+    ft.app(target=main)
\ No newline at end of file
@@ -0,0 +1,191 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from historico_treinos import FORMATO_REGISTRO, PASTA_TREINOS, _ler_cabecalho, arquivo_do_membro, membros_com_historico
+
+# ===================================================================
+# ANÁLISE DE TREINOS
+# Carrega o histórico de séries (historico_treinos) em arrays NumPy
+# por coluna e calcula as métricas de forma vetorizada, sem loops
+# Python por série. Os arrays de cada arquivo ficam em memória e, a
+# cada consulta, só os registros adicionados desde a última leitura
+# são lidos; as métricas só são recalculadas quando há séries novas.
+# ===================================================================
+
+# Mesmo layout do registro binário (sem alinhamento: 14 bytes).
+DTYPE_REGISTRO = np.dtype([("inicio", "<f8"), ("duracao", "<f4"), ("repeticoes", "<u2")])
+assert DTYPE_REGISTRO.itemsize == FORMATO_REGISTRO.size
+
+SEGUNDOS_DIA = 86_400
+SEGUNDOS_SEMANA = 7 * SEGUNDOS_DIA
+# 1970-01-01 foi uma quinta-feira; deslocando 4 dias as semanas
+# passam a começar na segunda-feira.
+_DESLOCAMENTO_SEGUNDA = 4 * SEGUNDOS_DIA
+
+JANELA_VOLUME_DIAS = 7
+# Intervalos entre séries maiores que isso são considerados fim do
+# treino, não descanso.
+DESCANSO_MAXIMO = 30 * 60
+FAIXAS_DESCANSO = np.array([0, 30, 60, 90, 120, 180, 300, 600, DESCANSO_MAXIMO], dtype=np.float64)
+
+
+# -------------------------------------------------------------------
+# CARGA INCREMENTAL
+# -------------------------------------------------------------------
+
+# Arrays de um arquivo de histórico, lidos de forma incremental:
+# guarda até onde o arquivo já foi lido e, na próxima atualização,
+# lê só o que foi adicionado depois disso. Os registros ficam em um
+# buffer que dobra de capacidade quando enche, então acrescentar
+# séries não copia o histórico inteiro a cada vez.
+class ColunasArquivo:
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._posicao = None
+        self._buffer = np.empty(0, dtype=DTYPE_REGISTRO)
+        self._quantidade = 0
+
+    @property
+    def registros(self) -> np.ndarray:
+        return self._buffer[:self._quantidade]
+
+    # Retorna True se surgiram registros novos desde a última chamada.
+    def atualizar(self) -> bool:
+        try:
+            tamanho = os.path.getsize(self.caminho)
+        except FileNotFoundError:
+            return False
+        with open(self.caminho, "rb") as f:
+            if self._posicao is None:
+                _, self._posicao = _ler_cabecalho(f)
+            completos = (tamanho - self._posicao) // DTYPE_REGISTRO.itemsize
+            if completos <= 0:
+                return False
+            f.seek(self._posicao)
+            dados = f.read(completos * DTYPE_REGISTRO.itemsize)
+        self._posicao += len(dados)
+        novos = np.frombuffer(dados, dtype=DTYPE_REGISTRO)
+        necessario = self._quantidade + len(novos)
+        if necessario > len(self._buffer):
+            maior = np.empty(max(necessario, 2 * len(self._buffer)), dtype=DTYPE_REGISTRO)
+            maior[:self._quantidade] = self.registros
+            self._buffer = maior
+        self._buffer[self._quantidade:necessario] = novos
+        self._quantidade = necessario
+        return True
+
+
+# -------------------------------------------------------------------
+# MÉTRICAS VETORIZADAS
+# -------------------------------------------------------------------
+
+# Calcula todas as métricas de um conjunto de séries. 'registros' é um
+# array estruturado com DTYPE_REGISTRO (qualquer ordem).
+def calcular_metricas(registros: np.ndarray) -> dict:
+    ordem = np.argsort(registros["inicio"], kind="stable")
+    inicio = registros["inicio"][ordem]
+    duracao = registros["duracao"][ordem].astype(np.float64)
+    repeticoes = registros["repeticoes"][ordem].astype(np.int64)
+    total = len(inicio)
+
+    # Volume móvel: repetições nos últimos N dias até cada série, com
+    # soma acumulada + busca binária da borda da janela.
+    acumulado = np.concatenate(([0], np.cumsum(repeticoes)))
+    borda = np.searchsorted(inicio, inicio - JANELA_VOLUME_DIAS * SEGUNDOS_DIA, side="left")
+    volume_movel = acumulado[1:] - acumulado[borda]
+
+    # Descanso: do fim de uma série até o início da seguinte.
+    descansos = inicio[1:] - (inicio[:-1] + duracao[:-1])
+    descansos = descansos[(descansos >= 0) & (descansos <= DESCANSO_MAXIMO)]
+
+    return {
+        "total_series": total,
+        "total_repeticoes": int(acumulado[-1]),
+        "duracao_media": float(duracao.mean()) if total else 0.0,
+        "volume_movel": volume_movel,
+        # Séries ordenadas e repetições acumuladas, para volume_recente().
+        "inicio": inicio,
+        "repeticoes_acumuladas": acumulado,
+        "descansos": _distribuicao_descanso(descansos),
+        "semanas": _agregado_semanal(inicio, duracao, repeticoes),
+    }
+
+
+# Repetições nos últimos 'dias' dias contados a partir de 'agora' (não
+# da última série: após uma semana sem treinar, o volume é zero). É
+# calculado a cada consulta, já que as métricas ficam memoizadas.
+def volume_recente(metricas: dict, agora: float = None, dias: int = JANELA_VOLUME_DIAS) -> int:
+    agora = time.time() if agora is None else agora
+    inicio, acumulado = metricas["inicio"], metricas["repeticoes_acumuladas"]
+    borda = np.searchsorted(inicio, agora - dias * SEGUNDOS_DIA, side="left")
+    fim = np.searchsorted(inicio, agora, side="right")
+    return int(acumulado[fim] - acumulado[borda])
+
+
+def _distribuicao_descanso(descansos: np.ndarray) -> dict:
+    contagens, _ = np.histogram(descansos, bins=FAIXAS_DESCANSO)
+    return {
+        "faixas": FAIXAS_DESCANSO,
+        "contagens": contagens,
+        "media": float(descansos.mean()) if len(descansos) else 0.0,
+        "mediana": float(np.median(descansos)) if len(descansos) else 0.0,
+    }
+
+
+# Agrupa por semana (segunda a domingo): séries, repetições e tempo
+# total, usando np.unique + np.bincount.
+def _agregado_semanal(inicio: np.ndarray, duracao: np.ndarray, repeticoes: np.ndarray) -> dict:
+    semana = np.floor((inicio + _DESLOCAMENTO_SEGUNDA) / SEGUNDOS_SEMANA).astype(np.int64)
+    semanas, indice = np.unique(semana, return_inverse=True)
+    return {
+        "inicio_semana": semanas * SEGUNDOS_SEMANA - _DESLOCAMENTO_SEGUNDA,
+        "series": np.bincount(indice, minlength=len(semanas)),
+        "repeticoes": np.bincount(indice, weights=repeticoes, minlength=len(semanas)).astype(np.int64),
+        "duracao": np.bincount(indice, weights=duracao, minlength=len(semanas)),
+    }
+
+
+# -------------------------------------------------------------------
+# CACHE POR MEMBRO E DA ACADEMIA
+# -------------------------------------------------------------------
+
+_lock = threading.Lock()
+_colunas = {}
+_metricas = {}
+
+
+def _colunas_do_arquivo(caminho: str):
+    colunas = _colunas.get(caminho)
+    if colunas is None:
+        colunas = _colunas[caminho] = ColunasArquivo(caminho)
+    return colunas, colunas.atualizar()
+
+
+# Métricas do membro, memoizadas: se nenhuma série nova foi gravada
+# desde a última consulta, o resultado anterior é devolvido direto.
+def analisar_membro(email: str, pasta: str = PASTA_TREINOS) -> dict:
+    caminho = arquivo_do_membro(email, pasta)
+    with _lock:
+        colunas, mudou = _colunas_do_arquivo(caminho)
+        if mudou or caminho not in _metricas:
+            _metricas[caminho] = calcular_metricas(colunas.registros)
+        return _metricas[caminho]
+
+
+# Métricas da academia inteira (todas as séries de todos os membros).
+def analisar_academia(pasta: str = PASTA_TREINOS) -> dict:
+    chave = ("academia", pasta)
+    with _lock:
+        mudou = False
+        partes = []
+        for _, caminho in membros_com_historico(pasta):
+            colunas, mudou_arquivo = _colunas_do_arquivo(caminho)
+            mudou = mudou or mudou_arquivo
+            partes.append(colunas.registros)
+        if mudou or chave not in _metricas or _metricas[chave]["total_series"] != sum(len(p) for p in partes):
+            registros = np.concatenate(partes) if partes else np.empty(0, dtype=DTYPE_REGISTRO)
+            _metricas[chave] = calcular_metricas(registros)
+        return _metricas[chave]
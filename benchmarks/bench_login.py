@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from persistencia import IndiceUsuarios
+
+# ===================================================================
+# BENCHMARK: BUSCA DE USUÁRIO NO LOGIN
+# Compara a varredura linear antiga (next(...) sobre a lista) com o
+# índice por email, de 10 a 1 milhão de usuários. O índice deve
+# manter a latência praticamente constante.
+#
+# Uso: python benchmarks/bench_login.py
+# ===================================================================
+
+TAMANHOS = (10, 1_000, 100_000, 1_000_000)
+CONSULTAS = 2_000
+
+
+def gerar_usuarios(n: int) -> list:
+    return [{"nome": f"Membro {i}", "email": f"membro{i}@academia.com", "password": "123"} for i in range(n)]
+
+
+# Mede o tempo médio (em microssegundos) de uma função de busca,
+# consultando sempre o último usuário (pior caso da varredura linear).
+def medir(buscar, email: str, repeticoes: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        buscar(email)
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def main():
+    print(f"{'usuários':>10} | {'linear (µs)':>12} | {'índice (µs)':>12}")
+    for n in TAMANHOS:
+        usuarios = gerar_usuarios(n)
+        indice = IndiceUsuarios(usuarios)
+        alvo = usuarios[-1]["email"].upper()
+
+        # A varredura linear é cara demais para repetir muitas vezes
+        # com listas grandes; poucas repetições já bastam para a média.
+        repeticoes_lineares = max(1, CONSULTAS * 10 // n)
+        linear = medir(lambda e: next((u for u in usuarios if u["email"].casefold() == e.casefold()), None), alvo, repeticoes_lineares)
+        indexado = medir(indice.buscar, alvo, CONSULTAS)
+        print(f"{n:>10} | {linear:>12.2f} | {indexado:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seguranca import CUSTOS, gerar_hash_senha, verificar_senha
+
+# ===================================================================
+# BENCHMARK: LOGINS POR SEGUNDO EM CADA NÍVEL DE CUSTO
+# Mede quantas verificações de senha por segundo um núcleo consegue
+# fazer com cada algoritmo/custo, e quanto isso escala usando todas
+# as threads do pool (o hashlib libera o GIL durante o cálculo).
+#
+# Uso: python benchmarks/bench_senhas.py [segundos_por_medicao]
+# ===================================================================
+
+DURACAO = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+
+
+# Roda verificações até completar 'DURACAO' segundos e retorna a taxa.
+def medir_taxa(armazenado: str, algoritmo: str, custo: str, threads: int) -> float:
+    def trabalhar(_):
+        feitas = 0
+        fim = time.perf_counter() + DURACAO
+        while time.perf_counter() < fim:
+            verificar_senha("senha-do-membro", armazenado, algoritmo, custo)
+            feitas += 1
+        return feitas
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        total = sum(pool.map(trabalhar, range(threads)))
+    return total / (time.perf_counter() - inicio)
+
+
+def main():
+    nucleos = os.cpu_count() or 1
+    print(f"{'algoritmo':<14} {'custo':<7} {'ms/login':>9} {'logins/s/núcleo':>16} {f'logins/s ({nucleos} threads)':>24}")
+    for algoritmo, niveis in CUSTOS.items():
+        for custo in niveis:
+            armazenado = gerar_hash_senha("senha-do-membro", algoritmo, custo)
+            por_nucleo = medir_taxa(armazenado, algoritmo, custo, 1)
+            total = medir_taxa(armazenado, algoritmo, custo, nucleos)
+            print(f"{algoritmo:<14} {custo:<7} {1000 / por_nucleo:>9.1f} {por_nucleo:>16.1f} {total:>24.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from persistencia import SqliteRepositorio
+from seguranca import gerar_hash_senha, verificar_senha
+
+# ===================================================================
+# TESTE DE CARGA: VÁRIOS PROCESSOS SOBRE O MESMO SQLITE
+# Reproduz o que os handlers de login e registro fazem com vários
+# processos (busca pelo índice de email do SQLite, sem o cache de
+# usuários, + hash/verificação de senha) em 1, 2, 4... processos ao
+# mesmo tempo, todos sobre o mesmo banco em modo WAL, como no
+# servidor.py. Mede a vazão total e confere que cada processo
+# enxerga os cadastros feitos pelos outros.
+#
+# Uso: python benchmarks/carga_multiprocesso.py [segundos] [custo]
+# ===================================================================
+
+DURACAO = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+CUSTO = sys.argv[2] if len(sys.argv) > 2 else "baixo"
+MEMBROS_INICIAIS = 200
+SENHA = "senha-do-membro"
+
+
+def preparar_banco(arquivo: str):
+    repositorio = SqliteRepositorio(arquivo)
+    senha = gerar_hash_senha(SENHA, custo=CUSTO)
+    repositorio.adicionar_varios(
+        {"nome": f"Membro {i}", "email": f"membro{i}@academia.com", "password": senha} for i in range(MEMBROS_INICIAIS)
+    )
+    repositorio.fechar()
+
+
+# Um processo de trabalho: a cada 10 operações, 1 cadastro e 9 logins.
+def trabalhador(arquivo: str, numero: int, barreira, resultados):
+    repositorio = SqliteRepositorio(arquivo)
+    barreira.wait()
+    operacoes = 0
+    cadastros = 0
+    fim = time.perf_counter() + DURACAO
+    while time.perf_counter() < fim:
+        if operacoes % 10 == 0:
+            email = f"novo{numero}-{cadastros}@academia.com"
+            repositorio.adicionar({"nome": "Novo", "email": email, "password": gerar_hash_senha(SENHA, custo=CUSTO)})
+            cadastros += 1
+        else:
+            usuario = repositorio.buscar_por_email(f"membro{operacoes % MEMBROS_INICIAIS}@academia.com")
+            confere, _ = verificar_senha(SENHA, usuario["password"], custo=CUSTO)
+            assert confere
+        operacoes += 1
+    # Espera todos terminarem e confere os cadastros dos outros processos.
+    barreira.wait()
+    resultados.put((numero, operacoes, cadastros, repositorio.contar()))
+
+
+def rodar(processos: int):
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo = os.path.join(pasta, "users.db")
+        preparar_banco(arquivo)
+        barreira = multiprocessing.Barrier(processos)
+        resultados = multiprocessing.Queue()
+        filhos = [multiprocessing.Process(target=trabalhador, args=(arquivo, i, barreira, resultados)) for i in range(processos)]
+        for filho in filhos:
+            filho.start()
+        coletados = [resultados.get() for _ in filhos]
+        for filho in filhos:
+            filho.join()
+    total_operacoes = sum(r[1] for r in coletados)
+    total_usuarios = MEMBROS_INICIAIS + sum(r[2] for r in coletados)
+    visiveis = all(r[3] == total_usuarios for r in coletados)
+    return total_operacoes / DURACAO, visiveis
+
+
+def main():
+    nucleos = os.cpu_count() or 1
+    quantidades = sorted({1, 2, 4, nucleos} | ({nucleos * 2} if nucleos > 1 else set()))
+    print(f"custo de senha: {CUSTO}, {DURACAO:.0f}s por medição, {nucleos} núcleo(s)")
+    print(f"{'processos':>9} | {'operações/s':>12} | {'escala':>6} | cadastros visíveis em todos")
+    base = None
+    for processos in quantidades:
+        vazao, visiveis = rodar(processos)
+        base = base or vazao
+        print(f"{processos:>9} | {vazao:>12.1f} | {vazao / base:>5.2f}x | {'sim' if visiveis else 'NÃO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from persistencia import BACKENDS, CacheUsuarios, criar_repositorio
+
+# ===================================================================
+# VERIFICAÇÃO: FALHAS NA GRAVAÇÃO ADIADA
+# Faz a escrita do repositório falhar enquanto a fila de gravação do
+# cache está com cadastros pendentes e confere que, depois das novas
+# tentativas, todos os cadastros estão no disco (relidos por um
+# repositório novo, como após reiniciar o app). Cobre, em cada
+# backend, uma falha antes de gravar qualquer coisa e, no diário,
+# uma falha no meio da escrita (só parte das linhas gravadas).
+#
+# Uso: python benchmarks/falhas_gravacao.py   (termina com código 1 se
+#      algum cadastro se perder)
+# ===================================================================
+
+EMAILS = ("a@academia.com", "b@academia.com", "c@academia.com")
+
+
+# Faz as primeiras 'falhas' chamadas de repositorio.<metodo> falharem.
+# Com 'parcial', a chamada que falha grava só a primeira linha antes.
+def injetar_falha(repositorio, metodo: str, falhas: int = 1, parcial: bool = False):
+    original = getattr(repositorio, metodo)
+    restantes = [falhas]
+
+    def com_falha(dados, *args, **kwargs):
+        if restantes[0] > 0:
+            restantes[0] -= 1
+            if parcial:
+                original(dados[:1], *args, **kwargs)
+            raise OSError("falha de escrita simulada")
+        return original(dados, *args, **kwargs)
+
+    setattr(repositorio, metodo, com_falha)
+
+
+def verificar(backend: str, metodo: str, parcial: bool = False) -> bool:
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo_json = os.path.join(pasta, "users.json")
+        repositorio = criar_repositorio(backend, arquivo_json)
+        cache = CacheUsuarios(repositorio, gravacao_adiada=True)
+        cache.fila.intervalo = 0.01
+        # Um cadastro já gravado antes da falha.
+        cache.adicionar({"nome": "Zé", "email": "z@academia.com", "password": "x"})
+        cache.esvaziar(5)
+        injetar_falha(repositorio, metodo, parcial=parcial)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for email in EMAILS:
+                cache.adicionar({"nome": "Membro", "email": email, "password": "x"})
+            esvaziou = cache.esvaziar(5)
+        pendentes = cache.nao_gravados()
+        repositorio.fechar()
+
+        relido = criar_repositorio(backend, arquivo_json)
+        no_disco = {u["email"] for u in relido.carregar()}
+        relido.fechar()
+    return esvaziou and not pendentes and no_disco >= set(EMAILS)
+
+
+def main():
+    cenarios = [(backend, "adicionar_varios", False) for backend in BACKENDS]
+    cenarios += [("journal", "_anexar", False), ("journal", "_anexar", True)]
+    print(f"{'backend':>8} | {'ponto da falha':<26} | cadastros gravados")
+    tudo_certo = True
+    for backend, metodo, parcial in cenarios:
+        gravados = verificar(backend, metodo, parcial)
+        tudo_certo = tudo_certo and gravados
+        descricao = f"{metodo}{' (parcial)' if parcial else ''}"
+        print(f"{backend:>8} | {descricao:<26} | {'sim' if gravados else 'NÃO'}")
+    if not tudo_certo:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+import argparse
+import asyncio
+import gc
+import importlib.util
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# ===================================================================
+# SUÍTE DE BENCHMARKS DO APP
+# Mede os caminhos mais usados do app sem navegador nem rede: a página
+# do Flet é real, mas ligada a uma conexão falsa que só responde aos
+# comandos. O script principal é carregado com importlib, como faz o
+# servidor.py, e cada cenário roda em uma pasta temporária.
+#
+# Os resultados saem em JSON (--saida) e podem ser comparados com os
+# de uma versão anterior (--comparar): qualquer medição que piorar
+# mais que o limite (--limite, padrão 25%) é uma regressão e o script
+# termina com código 1.
+#
+# Uso: python benchmarks/suite.py [--rapido] [--saida atual.json]
+#                                  [--comparar base.json] [--limite 0.25]
+# ===================================================================
+
+TAMANHOS = (1_000, 100_000, 1_000_000)
+TAMANHOS_RAPIDO = (1_000, 100_000)
+BACKENDS = ("json", "sqlite", "journal")
+QUANTIDADES_CRONOMETROS = (1, 10, 100)
+DURACAO_CRONOMETROS = 2.0
+DURACAO_CRONOMETROS_RAPIDO = 0.5
+LIMITE_REGRESSAO = 0.25
+
+# Um hash qualquer no formato real, para que as linhas tenham o
+# tamanho de produção sem calcular um scrypt por usuário.
+HASH_EXEMPLO = "scrypt$16384$8$1$" + "A" * 24 + "$" + "B" * 44
+
+
+def carregar_app():
+    import flet as ft
+
+    caminho = os.path.join(RAIZ, "Versão final.py")
+    spec = importlib.util.spec_from_file_location("versao_final", caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo, ft
+
+
+def gerar_usuarios(n: int, prefixo: str = "membro") -> list:
+    return [{"nome": f"Membro {i}", "email": f"{prefixo}{i}@academia.com", "password": HASH_EXEMPLO} for i in range(n)]
+
+
+# Melhor tempo (em segundos) de 'repeticoes' execuções da função.
+def melhor_tempo(funcao, repeticoes: int = 3) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        gc.collect()
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+# -------------------------------------------------------------------
+# PÁGINA FALSA
+# -------------------------------------------------------------------
+
+def criar_pagina(ft):
+    from flet.core.connection import Connection
+    from flet.core.protocol import PageCommandResponsePayload, PageCommandsBatchResponsePayload
+
+    class ConexaoFalsa(Connection):
+        def __init__(self):
+            super().__init__()
+            self.page_name = ""
+            self.page_url = ""
+            self.lotes = 0
+            self._ids = itertools.count(1)
+
+        # Responde como o cliente do Flet: um id novo para cada controle
+        # adicionado e nada para os demais comandos.
+        def send_commands(self, session_id, commands):
+            self.lotes += 1
+            resultados = [" ".join(f"_{next(self._ids)}" for _ in c.commands) for c in commands if c.name == "add"]
+            return PageCommandsBatchResponsePayload(results=resultados, error="")
+
+        def send_command(self, session_id, command):
+            return PageCommandResponsePayload(result="", error="")
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = asyncio.new_event_loop()
+    conexao = ConexaoFalsa()
+    pagina = ft.Page(conexao, f"bench-{next(_ids_sessao)}", loop=loop)
+    pagina.run_task = lambda *args, **kwargs: None
+    return pagina, conexao
+
+
+_ids_sessao = itertools.count(1)
+
+
+# Grava o que estiver pendente e esquece o repositório e o cache do
+# app, para o próximo cenário começar do zero.
+def fechar_app(app):
+    if app._cache_usuarios is not None:
+        app._cache_usuarios.esvaziar()
+    if app._repositorio is not None:
+        app._repositorio.fechar()
+    app._repositorio = None
+    app._cache_usuarios = None
+
+
+# Aponta o app para uma pasta nova, com o backend informado.
+def reiniciar_app(app, pasta: str, backend: str):
+    fechar_app(app)
+    os.chdir(pasta)
+    app.BACKEND_USUARIOS = backend
+
+
+# -------------------------------------------------------------------
+# CENÁRIOS
+# -------------------------------------------------------------------
+
+def bench_persistencia(app, tamanhos, resultados):
+    for backend in BACKENDS:
+        for n in tamanhos:
+            usuarios = gerar_usuarios(n)
+            with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as pasta:
+                reiniciar_app(app, pasta, backend)
+                repeticoes = 1 if n >= 1_000_000 else 3
+                salvar = melhor_tempo(lambda: app.salvar_usuarios(usuarios), repeticoes)
+                carregar = melhor_tempo(app.carregar_usuarios, repeticoes)
+                fechar_app(app)
+            registrar(resultados, f"salvar_usuarios.{backend}.{n}", salvar * 1000, "ms")
+            registrar(resultados, f"carregar_usuarios.{backend}.{n}", carregar * 1000, "ms")
+
+
+def bench_busca(app, resultados):
+    n = 100_000
+    consultas = 20_000
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as pasta:
+        reiniciar_app(app, pasta, "sqlite")
+        app.salvar_usuarios(gerar_usuarios(n))
+        cache = app.obter_cache_usuarios()
+        existentes = [f"MEMBRO{i}@academia.com" for i in range(0, n, n // consultas)]
+        ausentes = [f"ninguem{i}@academia.com" for i in range(consultas)]
+
+        def buscar_todos(emails):
+            for email in emails:
+                cache.buscar(email)
+
+        registrar(resultados, "login.busca_existente", melhor_tempo(lambda: buscar_todos(existentes)) / len(existentes) * 1e6, "µs")
+        registrar(resultados, "login.busca_ausente", melhor_tempo(lambda: buscar_todos(ausentes)) / len(ausentes) * 1e6, "µs")
+
+        # Cadastro: checagem de email repetido + inserção na fila de
+        # gravação, e depois o tempo até a fila chegar ao disco.
+        novos = gerar_usuarios(consultas, prefixo="novo")
+        inicio = time.perf_counter()
+        for usuario in novos:
+            if usuario["email"] not in cache:
+                cache.adicionar(usuario)
+        registro = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        cache.esvaziar()
+        gravacao = time.perf_counter() - inicio
+        fechar_app(app)
+    registrar(resultados, "registro.checagem_e_insercao", registro / consultas * 1e6, "µs")
+    registrar(resultados, "registro.esvaziar_fila", gravacao * 1000, "ms")
+
+
+def bench_construcao(app, ft, resultados):
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as pasta:
+        reiniciar_app(app, pasta, "sqlite")
+        app.salvar_usuarios(gerar_usuarios(1_000))
+        pagina, _ = criar_pagina(ft)
+        academia = app.AcademiaApp(pagina)
+        academia.usuario_logado = True
+        academia.usuario_atual = {"nome": "Membro 0", "email": "membro0@academia.com"}
+
+        registrar(resultados, "ui._build_components", melhor_tempo(academia._build_components, 20) * 1000, "ms")
+        registrar(resultados, "ui.AcademiaApp", melhor_tempo(lambda: app.AcademiaApp(pagina), 20) * 1000, "ms")
+        registrar(resultados, "ui.atualizar_interface", melhor_tempo(academia.atualizar_interface, 20) * 1000, "ms")
+
+        # Primeira visita a cada destino (constrói a tela) e visitas
+        # seguintes (só troca a View já construída).
+        for destino in ("cronome", "analises", "home"):
+            academia._descartar_telas_principais()
+            inicio = time.perf_counter()
+            academia.navegar_para(destino)
+            registrar(resultados, f"ui.navegar_para.{destino}.primeira", (time.perf_counter() - inicio) * 1000, "ms")
+        for destino in ("cronome", "analises", "home"):
+            registrar(resultados, f"ui.navegar_para.{destino}.cache",
+                      melhor_tempo(lambda: academia.navegar_para(destino), 20) * 1000, "ms")
+        academia._descartar_telas_principais()
+        fechar_app(app)
+
+
+# N membros, cada um com o cronômetro rodando na própria sessão, todos
+# redesenhados pelo mesmo agendador: quadros por segundo efetivamente
+# enviados, envios ao "navegador", deriva média dos ticks e CPU gasta
+# por segundo de relógio.
+async def _rodar_cronometros(app, ft, quantidade: int, duracao: float):
+    agendador = app.AgendadorCronometros(app.TAXA_CRONOMETRO_HZ)
+    conexoes = []
+    cronometros = []
+    for _ in range(quantidade):
+        pagina, conexao = criar_pagina(ft)
+        pagina.run_task = lambda funcao, *args: asyncio.get_running_loop().create_task(funcao(*args))
+        cronometro = app.CronometroApp(pagina, agendador=agendador)
+        pagina.views.append(ft.View("/bench", [cronometro.build()]))
+        pagina.update()
+        conexoes.append(conexao)
+        cronometros.append(cronometro)
+    lotes_iniciais = sum(c.lotes for c in conexoes)
+
+    inicio = time.monotonic()
+    cpu_inicial = time.process_time()
+    for cronometro in cronometros:
+        cronometro.iniciar_cronometro(None)
+    await asyncio.sleep(duracao)
+    for cronometro in cronometros:
+        cronometro.encerrar()
+    decorrido = time.monotonic() - inicio
+    cpu = time.process_time() - cpu_inicial
+    await asyncio.sleep(2 / agendador.taxa_hz)
+
+    quadros = sum(c.quadros_renderizados for c in cronometros)
+    envios = sum(c.lotes for c in conexoes) - lotes_iniciais
+    deriva = agendador.deriva_total / max(1, agendador.ticks)
+    return quadros / decorrido, envios / decorrido, deriva, cpu / decorrido
+
+
+def bench_cronometros(app, ft, duracao, resultados):
+    for quantidade in QUANTIDADES_CRONOMETROS:
+        quadros, envios, deriva, cpu = asyncio.run(_rodar_cronometros(app, ft, quantidade, duracao))
+        esperado = quantidade * app.TAXA_CRONOMETRO_HZ
+        registrar(resultados, f"cronometro.{quantidade}.quadros_por_s", quadros, "quadros/s", maior_melhor=True)
+        registrar(resultados, f"cronometro.{quantidade}.fracao_da_taxa", quadros / esperado, "fração", maior_melhor=True)
+        registrar(resultados, f"cronometro.{quantidade}.envios_por_s", envios, "envios/s")
+        registrar(resultados, f"cronometro.{quantidade}.deriva_media", deriva * 1000, "ms")
+        registrar(resultados, f"cronometro.{quantidade}.cpu", cpu, "s de CPU/s")
+
+
+# -------------------------------------------------------------------
+# RESULTADOS E COMPARAÇÃO
+# -------------------------------------------------------------------
+
+def registrar(resultados: dict, nome: str, valor: float, unidade: str, maior_melhor: bool = False):
+    resultados[nome] = {"valor": valor, "unidade": unidade, "maior_melhor": maior_melhor}
+    print(f"{nome:<45} {valor:>12.3f} {unidade}", flush=True)
+
+
+# Lista as medições que pioraram mais que 'limite' em relação à base.
+def comparar(base: dict, atual: dict, limite: float) -> list:
+    regressoes = []
+    for nome, medida in atual.items():
+        anterior = base.get(nome)
+        if anterior is None or not anterior["valor"]:
+            continue
+        variacao = medida["valor"] / anterior["valor"] - 1
+        piorou = -variacao if medida["maior_melhor"] else variacao
+        if piorou > limite:
+            regressoes.append((nome, anterior["valor"], medida["valor"], piorou))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do Espaço Fitness (sem navegador nem rede).")
+    parser.add_argument("--rapido", action="store_true", help="pula 1 milhão de usuários e encurta os cronômetros")
+    parser.add_argument("--saida", help="grava os resultados neste arquivo JSON")
+    parser.add_argument("--comparar", help="arquivo JSON de uma execução anterior para detectar regressões")
+    parser.add_argument("--limite", type=float, default=LIMITE_REGRESSAO, help="piora máxima aceita (0.25 = 25%%)")
+    argumentos = parser.parse_args()
+
+    app, ft = carregar_app()
+    resultados = {}
+    pasta_original = os.getcwd()
+    try:
+        bench_persistencia(app, TAMANHOS_RAPIDO if argumentos.rapido else TAMANHOS, resultados)
+        bench_busca(app, resultados)
+        bench_construcao(app, ft, resultados)
+        bench_cronometros(app, ft, DURACAO_CRONOMETROS_RAPIDO if argumentos.rapido else DURACAO_CRONOMETROS, resultados)
+    finally:
+        os.chdir(pasta_original)
+
+    relatorio = {
+        "horario": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+        "rapido": argumentos.rapido,
+        "resultados": resultados,
+    }
+    if argumentos.saida:
+        with open(argumentos.saida, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+
+    if argumentos.comparar:
+        with open(argumentos.comparar, encoding="utf-8") as f:
+            base = json.load(f)["resultados"]
+        regressoes = comparar(base, resultados, argumentos.limite)
+        for nome, anterior, atual, piorou in regressoes:
+            print(f"REGRESSÃO {nome}: {anterior:.3f} -> {atual:.3f} ({piorou:+.0%})")
+        if regressoes:
+            sys.exit(1)
+        print(f"Nenhuma regressão acima de {argumentos.limite:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
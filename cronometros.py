@@ -0,0 +1,204 @@
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from typing import NamedTuple
+
+from instrumentacao import cronometrar, descartar_lotes_herdados
+
+# ===================================================================
+# CRONÔMETROS E AGENDADOR COMPARTILHADO
+# O estado de cada cronômetro (início, pausas, voltas e programa de
+# intervalos) é só aritmética sobre o relógio monotônico: nada precisa
+# "contar" o tempo em segundo plano. Quem redesenha os cronômetros é
+# um único loop por processo (AgendadorCronometros), que a cada tick
+# visita todos os cronômetros visíveis de todas as sessões e manda um
+# envio por sessão, só se algum texto exibido mudou.
+# ===================================================================
+
+
+# Programa de intervalos: 'rodadas' repetições de 'trabalho' segundos
+# seguidos de 'descanso' segundos (o último descanso é omitido).
+class ProgramaIntervalos(NamedTuple):
+    nome: str
+    trabalho: float
+    descanso: float
+    rodadas: int
+
+    @property
+    def duracao_total(self) -> float:
+        return self.rodadas * self.trabalho + (self.rodadas - 1) * self.descanso
+
+    # Fase em que o programa está após 'decorrido' segundos:
+    # ("trabalho" | "descanso" | "fim", rodada (1..rodadas), restante).
+    def fase(self, decorrido: float):
+        if decorrido >= self.duracao_total:
+            return "fim", self.rodadas, 0.0
+        ciclo = self.trabalho + self.descanso
+        rodada, no_ciclo = divmod(decorrido, ciclo)
+        if no_ciclo < self.trabalho:
+            return "trabalho", int(rodada) + 1, self.trabalho - no_ciclo
+        return "descanso", int(rodada) + 1, ciclo - no_ciclo
+
+
+class Cronometro:
+    def __init__(self, programa: ProgramaIntervalos = None):
+        self.programa = programa
+        self.voltas = []
+        self._inicio = None
+        self._pausado_em = None
+        self._tempo_pausado = 0.0
+        self._total_final = 0.0
+
+    @property
+    def rodando(self) -> bool:
+        return self._inicio is not None
+
+    @property
+    def pausado(self) -> bool:
+        return self._pausado_em is not None
+
+    # (Re)inicia do zero.
+    def iniciar(self, agora: float = None):
+        self._inicio = time.monotonic() if agora is None else agora
+        self._pausado_em = None
+        self._tempo_pausado = 0.0
+        self._total_final = 0.0
+        self.voltas = []
+
+    def pausar(self, agora: float = None):
+        if self.rodando and not self.pausado:
+            self._pausado_em = time.monotonic() if agora is None else agora
+
+    def retomar(self, agora: float = None):
+        if self.pausado:
+            self._tempo_pausado += (time.monotonic() if agora is None else agora) - self._pausado_em
+            self._pausado_em = None
+
+    # Tempo corrido, sem contar as pausas. Parado, é o tempo total da
+    # última série (até a próxima vez que for iniciado).
+    def decorrido(self, agora: float = None) -> float:
+        if not self.rodando:
+            return self._total_final
+        if self.pausado:
+            agora = self._pausado_em
+        elif agora is None:
+            agora = time.monotonic()
+        return agora - self._inicio - self._tempo_pausado
+
+    # Marca uma volta e retorna o tempo dela (desde a volta anterior).
+    def volta(self, agora: float = None) -> float:
+        total = self.decorrido(agora)
+        parcial = total - (self.voltas[-1] if self.voltas else 0.0)
+        self.voltas.append(total)
+        return parcial
+
+    # Para o cronômetro e retorna o tempo corrido. Com programa de
+    # intervalos, o tempo não passa da duração do programa (o tick que
+    # percebe o fim pode chegar um pouco depois dele).
+    def parar(self, agora: float = None) -> float:
+        total = self.decorrido(agora)
+        if self.programa is not None:
+            total = min(total, self.programa.duracao_total)
+        self._inicio = None
+        self._pausado_em = None
+        self._total_final = total
+        return total
+
+    # True quando o programa de intervalos chegou ao fim.
+    def terminou(self, agora: float = None) -> bool:
+        return self.programa is not None and self.rodando and self.decorrido(agora) >= self.programa.duracao_total
+
+
+# ===================================================================
+# AGENDADOR
+# Os inscritos precisam ter o atributo 'atualizador' (o da sessão) e
+# o método quadro(agora), que atualiza os próprios textos e pede o
+# envio dos controles que mudaram. O agendador abre um lote por
+# sessão em volta dos quadros dela, então a sessão recebe no máximo
+# um envio por tick, seja qual for o número de cronômetros nela.
+# ===================================================================
+
+class AgendadorCronometros:
+    def __init__(self, taxa_hz: float):
+        self.taxa_hz = taxa_hz
+        self._inscritos = set()
+        self._lock = threading.Lock()
+        self._executando = False
+        self._loop = None
+        # Estatísticas: ticks executados e atraso (deriva) em relação
+        # ao horário planejado de cada tick.
+        self.ticks = 0
+        self.deriva_max = 0.0
+        self.deriva_total = 0.0
+
+    # Inclui o inscrito nos ticks. O loop é iniciado (pelo page.run_task
+    # da sessão) quando o primeiro cronômetro entra.
+    def inscrever(self, inscrito, page):
+        with self._lock:
+            self._inscritos.add(inscrito)
+            if self._executando and self._loop is not None and self._loop.is_closed():
+                self._executando = False
+            if self._executando:
+                return
+            self._executando = True
+            self._loop = None
+        page.run_task(self._executar)
+
+    def cancelar(self, inscrito):
+        with self._lock:
+            self._inscritos.discard(inscrito)
+
+    def __len__(self) -> int:
+        return len(self._inscritos)
+
+    # Um tick: agrupa os inscritos por sessão e redesenha cada grupo
+    # dentro de um único lote.
+    def _tick(self, agora: float):
+        with self._lock:
+            inscritos = list(self._inscritos)
+        por_sessao = defaultdict(list)
+        for inscrito in inscritos:
+            por_sessao[inscrito.atualizador].append(inscrito)
+        for atualizador, grupo in por_sessao.items():
+            try:
+                with atualizador.lote("cronometro.quadro"):
+                    for inscrito in grupo:
+                        inscrito.quadro(agora)
+            except Exception as erro:
+                # Uma sessão com problema (ex.: conexão caída) sai dos
+                # ticks sem parar os cronômetros das outras.
+                print(f"[cronometros] sessão removida do agendador: {erro!r}")
+                for inscrito in grupo:
+                    self.cancelar(inscrito)
+
+    # Loop único. Os ticks são agendados em horários fixos do relógio
+    # monotônico, o que evita acumular atraso; se o loop ficar para
+    # trás, os ticks perdidos são pulados. Termina quando não houver
+    # mais inscritos.
+    async def _executar(self):
+        descartar_lotes_herdados()
+        self._loop = asyncio.get_running_loop()
+        intervalo = 1 / self.taxa_hz
+        proximo_tick = time.monotonic()
+        try:
+            while True:
+                with self._lock:
+                    if not self._inscritos:
+                        self._executando = False
+                        return
+                agora = time.monotonic()
+                deriva = max(0.0, agora - proximo_tick)
+                self.deriva_max = max(self.deriva_max, deriva)
+                self.deriva_total += deriva
+                with cronometrar("cronometro.tick"):
+                    self._tick(agora)
+                self.ticks += 1
+
+                proximo_tick += intervalo
+                if proximo_tick < agora:
+                    proximo_tick = agora + intervalo
+                await asyncio.sleep(proximo_tick - time.monotonic())
+        finally:
+            with self._lock:
+                self._executando = False
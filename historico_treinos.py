@@ -0,0 +1,129 @@
+import hashlib
+import os
+import struct
+import threading
+from typing import NamedTuple
+
+from persistencia import normalizar_email
+
+# ===================================================================
+# HISTÓRICO DE TREINOS
+# Cada série registrada no cronômetro (início, duração e repetições)
+# vira um registro binário de tamanho fixo, adicionado ao fim do
+# arquivo do membro. Nada é reescrito: gravar uma série é um único
+# write de 14 bytes, e a leitura é feita em blocos por um gerador,
+# então o histórico inteiro nunca precisa caber na memória.
+#
+# Formato do arquivo (little-endian):
+#   cabeçalho:  b"EFT1" | tamanho do email (uint16) | email (utf-8)
+#   registros:  início (float64, epoch em segundos)
+#               duração (float32, segundos)
+#               repetições (uint16)
+# ===================================================================
+
+PASTA_TREINOS = "treinos"
+ASSINATURA_ARQUIVO = b"EFT1"
+FORMATO_REGISTRO = struct.Struct("<dfH")
+REGISTROS_POR_BLOCO = 4096
+
+
+class SerieTreino(NamedTuple):
+    inicio: float
+    duracao: float
+    repeticoes: int
+
+
+_lock_escrita = threading.Lock()
+
+
+# Nome do arquivo de um membro: hash do email normalizado, para não
+# depender de caracteres do email no sistema de arquivos.
+def arquivo_do_membro(email: str, pasta: str = PASTA_TREINOS) -> str:
+    resumo = hashlib.sha1(normalizar_email(email).encode("utf-8")).hexdigest()
+    return os.path.join(pasta, f"{resumo}.bin")
+
+
+def _cabecalho(email: str) -> bytes:
+    dados_email = normalizar_email(email).encode("utf-8")
+    return ASSINATURA_ARQUIVO + struct.pack("<H", len(dados_email)) + dados_email
+
+
+# Lê o cabeçalho e retorna (email, posição do primeiro registro).
+def _ler_cabecalho(f):
+    if f.read(len(ASSINATURA_ARQUIVO)) != ASSINATURA_ARQUIVO:
+        raise ValueError(f"Arquivo de treinos inválido: {f.name}")
+    (tamanho,) = struct.unpack("<H", f.read(2))
+    email = f.read(tamanho).decode("utf-8")
+    return email, f.tell()
+
+
+# Adiciona uma série ao histórico do membro (cria o arquivo na
+# primeira vez). O registro é escrito com uma única chamada em modo
+# append, então escritas de sessões diferentes não se misturam. Se
+# uma escrita anterior foi interrompida no meio, o pedaço incompleto
+# é descartado antes, para os registros seguintes ficarem alinhados.
+def registrar_serie(email: str, inicio: float, duracao: float, repeticoes: int, pasta: str = PASTA_TREINOS):
+    caminho = arquivo_do_membro(email, pasta)
+    cabecalho = _cabecalho(email)
+    registro = FORMATO_REGISTRO.pack(inicio, duracao, max(0, min(repeticoes, 0xFFFF)))
+    with _lock_escrita:
+        try:
+            tamanho = os.path.getsize(caminho)
+        except FileNotFoundError:
+            os.makedirs(pasta, exist_ok=True)
+            tamanho = None
+        with open(caminho, "ab") as f:
+            if tamanho is None:
+                f.write(cabecalho + registro)
+                return
+            excesso = (tamanho - len(cabecalho)) % FORMATO_REGISTRO.size
+            if excesso:
+                f.truncate(tamanho - excesso)
+            f.write(registro)
+
+
+# Gera os registros do membro em blocos de bytes brutos (múltiplos do
+# tamanho do registro). Um registro incompleto no fim do arquivo
+# (queda durante a escrita) é ignorado.
+def ler_blocos(email: str, pasta: str = PASTA_TREINOS, registros_por_bloco: int = REGISTROS_POR_BLOCO):
+    caminho = arquivo_do_membro(email, pasta)
+    if not os.path.exists(caminho):
+        return
+    yield from _ler_blocos_arquivo(caminho, registros_por_bloco)
+
+
+def _ler_blocos_arquivo(caminho: str, registros_por_bloco: int = REGISTROS_POR_BLOCO):
+    tamanho_bloco = FORMATO_REGISTRO.size * registros_por_bloco
+    with open(caminho, "rb") as f:
+        _ler_cabecalho(f)
+        resto = b""
+        while True:
+            dados = f.read(tamanho_bloco)
+            if not dados:
+                break
+            dados = resto + dados
+            util = len(dados) - len(dados) % FORMATO_REGISTRO.size
+            resto = dados[util:]
+            if util:
+                yield dados[:util]
+
+
+# Percorre o histórico do membro, uma série por vez, sem carregá-lo
+# inteiro na memória.
+def ler_series(email: str, pasta: str = PASTA_TREINOS):
+    for bloco in ler_blocos(email, pasta):
+        for inicio, duracao, repeticoes in FORMATO_REGISTRO.iter_unpack(bloco):
+            yield SerieTreino(inicio, duracao, repeticoes)
+
+
+# Lista (email, caminho) de todos os membros com histórico.
+def membros_com_historico(pasta: str = PASTA_TREINOS):
+    if not os.path.isdir(pasta):
+        return
+    for nome in sorted(os.listdir(pasta)):
+        if not nome.endswith(".bin"):
+            continue
+        caminho = os.path.join(pasta, nome)
+        with open(caminho, "rb") as f:
+            email, _ = _ler_cabecalho(f)
+        yield email, caminho
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+
+# ===================================================================
+# PIPELINE DE IMAGENS
+# Gera versões redimensionadas e recomprimidas (JPEG/PNG e WebP) das
+# imagens de assets/ no tamanho em que cada ft.Image as exibe, com o
+# hash do conteúdo no nome do arquivo. Como o nome muda sempre que a
+# imagem muda, o navegador pode guardá-las em cache por tempo
+# indeterminado (Cache-Control: max-age=31536000, immutable).
+#
+# Uso (etapa de build, requer Pillow):  python imagens.py
+# Em tempo de execução o app só lê o manifesto gerado; sem ele, as
+# imagens originais continuam sendo usadas.
+# ===================================================================
+
+PASTA_SAIDA = os.path.join("assets", "otimizadas")
+ARQUIVO_MANIFESTO = os.path.join(PASTA_SAIDA, "manifesto.json")
+
+# Imagens usadas pelo app e o tamanho (largura, altura) em que os
+# controles ft.Image as exibem. Manter em sincronia com a UI.
+IMAGENS_DO_APP = (
+    ("assets/logfit.png", 200, 200),
+    ("assets/turma_malhando.jpeg", 300, 200),
+    ("assets/andreia.jpeg", 300, 200),
+)
+
+# Densidade de pixels das variantes: 2x deixa a imagem nítida em
+# celulares e telas de alta resolução sem chegar ao tamanho original.
+DENSIDADE = 2
+QUALIDADE_JPEG = 80
+QUALIDADE_WEBP = 78
+
+
+def _chave(src: str, largura: int, altura: int) -> str:
+    return f"{src}@{largura}x{altura}"
+
+
+# -------------------------------------------------------------------
+# USO EM TEMPO DE EXECUÇÃO
+# -------------------------------------------------------------------
+
+_manifesto = None
+
+
+def _carregar_manifesto() -> dict:
+    global _manifesto
+    if _manifesto is None:
+        try:
+            with open(ARQUIVO_MANIFESTO, "r", encoding="utf-8") as f:
+                _manifesto = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            _manifesto = {}
+    return _manifesto
+
+
+# Retorna o caminho da melhor variante gerada para a imagem exibida
+# em largura x altura (WebP, se existir), ou o próprio src caso o
+# pipeline ainda não tenha sido executado.
+def caminho_imagem(src: str, largura: int, altura: int) -> str:
+    entrada = _carregar_manifesto().get(_chave(src, largura, altura))
+    if entrada is None:
+        return src
+    return entrada.get("webp") or entrada.get("padrao") or src
+
+
+# -------------------------------------------------------------------
+# ETAPA DE BUILD
+# -------------------------------------------------------------------
+
+# Salva a imagem em memória no formato pedido e grava com o hash do
+# conteúdo no nome. Retorna (caminho, bytes gravados).
+def _salvar_variante(imagem, base: str, formato: str, extensao: str, **opcoes):
+    from io import BytesIO
+
+    buffer = BytesIO()
+    imagem.save(buffer, formato, **opcoes)
+    dados = buffer.getvalue()
+    resumo = hashlib.sha256(dados).hexdigest()[:12]
+    caminho = os.path.join(PASTA_SAIDA, f"{base}.{resumo}.{extensao}")
+    if not os.path.exists(caminho):
+        with open(caminho, "wb") as f:
+            f.write(dados)
+    return caminho.replace(os.sep, "/"), len(dados)
+
+
+# PNG só é mantido quando a imagem usa transparência de fato; as
+# demais viram JPEG, bem menor para fotos.
+def _tem_transparencia(imagem) -> bool:
+    if imagem.mode == "P":
+        return "transparency" in imagem.info
+    if imagem.mode in ("RGBA", "LA"):
+        return imagem.getchannel("A").getextrema()[0] < 255
+    return False
+
+
+# Gera as variantes de todas as imagens do app e grava o manifesto.
+# Retorna o relatório com os bytes economizados por imagem.
+def gerar_variantes(imagens=IMAGENS_DO_APP, densidade: int = DENSIDADE) -> list:
+    try:
+        from PIL import Image
+    except ImportError:
+        raise SystemExit("O pipeline de imagens precisa do Pillow: pip install Pillow")
+
+    os.makedirs(PASTA_SAIDA, exist_ok=True)
+    manifesto = {}
+    relatorio = []
+    for src, largura, altura in imagens:
+        tamanho_original = os.path.getsize(src)
+        with Image.open(src) as original:
+            imagem = original.copy()
+        # thumbnail mantém a proporção (como o ft.Image faz ao exibir)
+        # e nunca aumenta uma imagem menor que o tamanho pedido.
+        imagem.thumbnail((largura * densidade, altura * densidade), Image.LANCZOS)
+        nome = os.path.splitext(os.path.basename(src))[0]
+        base = f"{nome}.{largura}x{altura}@{densidade}x"
+
+        if _tem_transparencia(imagem):
+            padrao, bytes_padrao = _salvar_variante(imagem, base, "PNG", "png", optimize=True)
+        else:
+            padrao, bytes_padrao = _salvar_variante(imagem.convert("RGB"), base, "JPEG", "jpg", quality=QUALIDADE_JPEG, optimize=True, progressive=True)
+        webp, bytes_webp = _salvar_variante(imagem, base, "WEBP", "webp", quality=QUALIDADE_WEBP, method=6)
+
+        manifesto[_chave(src, largura, altura)] = {"padrao": padrao, "webp": webp}
+        relatorio.append({
+            "src": src,
+            "exibicao": f"{largura}x{altura}",
+            "original": tamanho_original,
+            "padrao": bytes_padrao,
+            "webp": bytes_webp,
+            "economia": tamanho_original - min(bytes_padrao, bytes_webp),
+        })
+
+    with open(ARQUIVO_MANIFESTO, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, indent=4)
+    global _manifesto
+    _manifesto = manifesto
+    return relatorio
+
+
+def imprimir_relatorio(relatorio: list):
+    print(f"{'imagem':<30} {'exibição':>9} {'original':>10} {'padrão':>10} {'webp':>10} {'economia':>10}")
+    for item in relatorio:
+        percentual = item["economia"] / item["original"] * 100 if item["original"] else 0
+        print(f"{item['src']:<30} {item['exibicao']:>9} {item['original']:>10} {item['padrao']:>10} {item['webp']:>10} "
+              f"{item['economia']:>10} ({percentual:.0f}%)")
+    total_original = sum(item["original"] for item in relatorio)
+    total_economia = sum(item["economia"] for item in relatorio)
+    print(f"Total: {total_economia} de {total_original} bytes economizados")
+
+
+if __name__ == "__main__":
+    os.chdir(os.path.dirname(os.path.abspath(__file__)) or ".")
+    imprimir_relatorio(gerar_variantes())
@@ -0,0 +1,436 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+# ===================================================================
+# ATUALIZAÇÕES DE PÁGINA EM LOTE E CONTADORES
+# Cada page.update() é uma comparação completa da árvore de controles
+# e uma mensagem pelo websocket. O AtualizadorPagina agrupa todas as
+# atualizações feitas dentro de uma ação do usuário (um clique) em
+# um único envio e conta quantas atualizações e quantos bytes cada
+# ação gerou.
+# ===================================================================
+
+# Com ESPACO_FITNESS_INSTRUMENTACAO=1, os bytes enviados ao navegador
+# também são medidos (serializa cada lote de comandos mais uma vez) e
+# o tempo de cada handler vai para os histogramas de 'metricas'.
+INSTRUMENTACAO = os.environ.get("ESPACO_FITNESS_INSTRUMENTACAO") == "1"
+MEDIR_BYTES = INSTRUMENTACAO
+
+# Arquivo onde as métricas são despejadas periodicamente (".json" ou,
+# qualquer outra extensão, texto no formato do Prometheus) e o
+# intervalo entre despejos, em segundos.
+ARQUIVO_METRICAS = os.environ.get("ESPACO_FITNESS_METRICAS_ARQUIVO")
+INTERVALO_METRICAS = float(os.environ.get("ESPACO_FITNESS_METRICAS_INTERVALO", "15"))
+
+# Limites superiores das faixas dos histogramas (como no Prometheus, a
+# última faixa, +Inf, é implícita).
+FAIXAS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+FAIXAS_BYTES = (256, 1024, 4096, 16_384, 65_536, 262_144, 1_048_576)
+
+ACAO_AVULSA = "(sem ação)"
+
+# Lotes em andamento (atualizador -> lote) e ação sendo enviada. São
+# variáveis de contexto para que cada handler tenha o seu estado,
+# seja ele executado em uma thread do Flet ou como tarefa asyncio.
+_lotes_em_andamento = contextvars.ContextVar("lotes_em_andamento", default={})
+_acao_em_envio = contextvars.ContextVar("acao_em_envio", default=None)
+
+
+# Estatísticas acumuladas de uma ação (ex.: "login", "registrar").
+class EstatisticaAcao:
+    def __init__(self):
+        self.execucoes = 0
+        self.atualizacoes = 0
+        self.bytes_enviados = 0
+
+    def como_dict(self) -> dict:
+        return {"execucoes": self.execucoes, "atualizacoes": self.atualizacoes, "bytes_enviados": self.bytes_enviados}
+
+
+# -------------------------------------------------------------------
+# MEDIÇÃO DE BYTES
+# A conexão do Flet é compartilhada por todas as sessões do processo,
+# então o send_commands dela é envolvido uma única vez e os bytes são
+# repassados ao atualizador da sessão dona de cada lote de comandos.
+# -------------------------------------------------------------------
+_lock_conexoes = threading.Lock()
+
+
+def _registrar_medidor_bytes(page, atualizador):
+    conexao = getattr(page, "connection", None)
+    id_sessao = getattr(page, "session_id", None)
+    if conexao is None or id_sessao is None or not hasattr(conexao, "send_commands"):
+        return
+    with _lock_conexoes:
+        medidores = getattr(conexao, "_medidores_bytes", None)
+        if medidores is None:
+            from flet.core.protocol import CommandEncoder
+
+            medidores = {}
+            enviar_original = conexao.send_commands
+
+            def send_commands(session_id, commands):
+                medidor = medidores.get(session_id)
+                if medidor is not None:
+                    medidor._somar_bytes(len(json.dumps(commands, cls=CommandEncoder, separators=(",", ":"))))
+                return enviar_original(session_id, commands)
+
+            conexao.send_commands = send_commands
+            conexao._medidores_bytes = medidores
+        medidores[id_sessao] = atualizador
+
+
+def _remover_medidor_bytes(page):
+    conexao = getattr(page, "connection", None)
+    medidores = getattr(conexao, "_medidores_bytes", None)
+    if medidores is not None:
+        with _lock_conexoes:
+            medidores.pop(getattr(page, "session_id", None), None)
+
+
+class AtualizadorPagina:
+    def __init__(self, page, medir_bytes: bool = MEDIR_BYTES):
+        self.page = page
+        self.total_atualizacoes = 0
+        self.total_bytes = 0
+        self.por_acao = {}
+        self.tarefas_ativas = {}
+        if medir_bytes:
+            _registrar_medidor_bytes(page, self)
+        metricas.registrar_sessao(self)
+
+    def _lote_atual(self):
+        return _lotes_em_andamento.get().get(self)
+
+    def _estatistica(self, acao: str) -> EstatisticaAcao:
+        estatistica = self.por_acao.get(acao)
+        if estatistica is None:
+            estatistica = self.por_acao[acao] = EstatisticaAcao()
+        return estatistica
+
+    def _somar_bytes(self, quantidade: int):
+        self.total_bytes += quantidade
+        self._estatistica(_acao_em_envio.get() or ACAO_AVULSA).bytes_enviados += quantidade
+        metricas.observar_envio(quantidade)
+
+    # Pede a atualização dos controles informados (ou da página inteira,
+    # se nenhum for informado). Dentro de um lote, o envio é adiado
+    # até o fim da ação; fora dele, é feito na hora.
+    def atualizar(self, *controles):
+        lote = self._lote_atual()
+        if lote is not None:
+            if not controles:
+                lote["pagina"] = True
+            for controle in controles:
+                if all(controle is not c for c in lote["controles"]):
+                    lote["controles"].append(controle)
+            return
+        self._enviar(ACAO_AVULSA, pagina=not controles, controles=controles)
+
+    def _enviar(self, acao: str, pagina: bool, controles):
+        token = _acao_em_envio.set(acao)
+        try:
+            if pagina:
+                self.page.update()
+            else:
+                # Controles que ainda não estão na página (tela não
+                # exibida) não têm o que enviar.
+                controles = [c for c in controles if c.page is not None]
+                if not controles:
+                    return
+                self.page.update(*controles)
+        finally:
+            _acao_em_envio.reset(token)
+        self.total_atualizacoes += 1
+        self._estatistica(acao).atualizacoes += 1
+        metricas.contar_atualizacao()
+
+    # Agrupa todas as atualizações feitas dentro do bloco em um único
+    # envio ao final. Se algum trecho pediu a página inteira, só ela é
+    # enviada; senão, apenas os controles alterados. Lotes aninhados
+    # fazem parte do lote mais externo.
+    @contextmanager
+    def lote(self, acao: str):
+        if self._lote_atual() is not None:
+            yield
+            return
+        lote = {"pagina": False, "controles": []}
+        token = _lotes_em_andamento.set({**_lotes_em_andamento.get(), self: lote})
+        self._estatistica(acao).execucoes += 1
+        try:
+            yield
+        finally:
+            _lotes_em_andamento.reset(token)
+            if lote["pagina"] or lote["controles"]:
+                self._enviar(acao, lote["pagina"], lote["controles"])
+
+    # Contam as tarefas de fundo ativas da sessão (ex.: cronômetros
+    # inscritos no agendador).
+    def iniciar_tarefa(self, nome: str):
+        self.tarefas_ativas[nome] = self.tarefas_ativas.get(nome, 0) + 1
+
+    def encerrar_tarefa(self, nome: str):
+        restantes = self.tarefas_ativas.get(nome, 0) - 1
+        if restantes > 0:
+            self.tarefas_ativas[nome] = restantes
+        else:
+            self.tarefas_ativas.pop(nome, None)
+
+    # Marca uma tarefa como ativa enquanto o bloco estiver em execução.
+    @contextmanager
+    def tarefa(self, nome: str):
+        self.iniciar_tarefa(nome)
+        try:
+            yield
+        finally:
+            self.encerrar_tarefa(nome)
+
+    def estatisticas(self) -> dict:
+        return {
+            "atualizacoes": self.total_atualizacoes,
+            "bytes_enviados": self.total_bytes,
+            "por_acao": {acao: e.como_dict() for acao, e in self.por_acao.items()},
+            "tarefas_ativas": dict(self.tarefas_ativas),
+        }
+
+    # Desliga a medição de bytes desta sessão (ao desconectar).
+    def encerrar(self):
+        _remover_medidor_bytes(self.page)
+
+
+# Tarefas de fundo iniciadas de dentro de um handler (page.run_task)
+# herdam uma cópia das variáveis de contexto dele, inclusive o lote em
+# andamento, que nunca seria enviado. Chamada no início da tarefa,
+# descarta essa herança.
+def descartar_lotes_herdados():
+    _lotes_em_andamento.set({})
+    _acao_em_envio.set(None)
+
+
+# Decorador para métodos de handlers: todas as atualizações feitas
+# durante o método saem em um único envio ao final, contabilizadas
+# sob o nome da ação. A classe precisa ter o atributo 'atualizador'.
+# Funciona com handlers comuns e assíncronos (async def). Com a
+# instrumentação ligada, o tempo do handler (incluindo o envio) vai
+# para o histograma da ação.
+def acao_do_usuario(nome: str):
+    def decorador(metodo):
+        if inspect.iscoroutinefunction(metodo):
+            @functools.wraps(metodo)
+            async def envolvido_async(self, *args, **kwargs):
+                with cronometrar(nome), self.atualizador.lote(nome):
+                    return await metodo(self, *args, **kwargs)
+            return envolvido_async
+
+        @functools.wraps(metodo)
+        def envolvido(self, *args, **kwargs):
+            with cronometrar(nome), self.atualizador.lote(nome):
+                return metodo(self, *args, **kwargs)
+        return envolvido
+    return decorador
+
+
+# ===================================================================
+# MÉTRICAS DE DESEMPENHO (OPCIONAIS)
+# Histogramas de latência por handler, contagem de atualizações,
+# tamanho dos envios e tarefas de fundo ativas por sessão, somados
+# para o processo inteiro. Exibidos na tela de métricas (só para
+# administradores) e despejados periodicamente em um arquivo.
+# ===================================================================
+
+class Histograma:
+    def __init__(self, faixas):
+        self.faixas = faixas
+        self.contagens = [0] * (len(faixas) + 1)
+        self.soma = 0.0
+        self.quantidade = 0
+        self.maximo = 0.0
+
+    def observar(self, valor: float):
+        indice = 0
+        while indice < len(self.faixas) and valor > self.faixas[indice]:
+            indice += 1
+        self.contagens[indice] += 1
+        self.soma += valor
+        self.quantidade += 1
+        self.maximo = max(self.maximo, valor)
+
+    # Estimativa do percentil (0 a 1): limite superior da faixa onde ele
+    # cai (ou o máximo observado, se for a última faixa).
+    def percentil(self, fracao: float) -> float:
+        if not self.quantidade:
+            return 0.0
+        alvo = fracao * self.quantidade
+        acumulado = 0
+        for indice, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return self.faixas[indice] if indice < len(self.faixas) else self.maximo
+        return self.maximo
+
+    def como_dict(self) -> dict:
+        return {
+            "quantidade": self.quantidade,
+            "soma": self.soma,
+            "maximo": self.maximo,
+            "p50": self.percentil(0.5),
+            "p95": self.percentil(0.95),
+            "faixas": list(self.faixas),
+            "contagens": list(self.contagens),
+        }
+
+
+class RegistroMetricas:
+    def __init__(self, ligado: bool = INSTRUMENTACAO):
+        self.ligado = ligado
+        self._lock = threading.Lock()
+        self.latencias = {}
+        self.atualizacoes = 0
+        self.envios = Histograma(FAIXAS_BYTES)
+        self._sessoes = weakref.WeakSet()
+
+    def observar_latencia(self, nome: str, segundos: float):
+        with self._lock:
+            histograma = self.latencias.get(nome)
+            if histograma is None:
+                histograma = self.latencias[nome] = Histograma(FAIXAS_LATENCIA)
+            histograma.observar(segundos)
+
+    def observar_envio(self, quantidade: int):
+        with self._lock:
+            self.envios.observar(quantidade)
+
+    def contar_atualizacao(self):
+        if not self.ligado:
+            return
+        with self._lock:
+            self.atualizacoes += 1
+
+    def registrar_sessao(self, atualizador: AtualizadorPagina):
+        with self._lock:
+            self._sessoes.add(atualizador)
+
+    # Retrato de todas as métricas, pronto para virar JSON.
+    def instantaneo(self) -> dict:
+        with self._lock:
+            sessoes = list(self._sessoes)
+            return {
+                "horario": time.time(),
+                "latencias": {nome: h.como_dict() for nome, h in sorted(self.latencias.items())},
+                "atualizacoes": self.atualizacoes,
+                "bytes_por_envio": self.envios.como_dict(),
+                "sessoes": {
+                    str(getattr(a.page, "session_id", id(a))): {
+                        "atualizacoes": a.total_atualizacoes,
+                        "bytes_enviados": a.total_bytes,
+                        "tarefas_ativas": dict(a.tarefas_ativas),
+                    }
+                    for a in sessoes
+                },
+            }
+
+    def exportar_json(self) -> str:
+        return json.dumps(self.instantaneo(), ensure_ascii=False, indent=2)
+
+    # Mesmas métricas no formato de texto do Prometheus.
+    def exportar_prometheus(self) -> str:
+        dados = self.instantaneo()
+        linhas = [
+            "# TYPE espaco_fitness_handler_segundos histogram",
+        ]
+        for nome, h in dados["latencias"].items():
+            linhas += _linhas_histograma("espaco_fitness_handler_segundos", h, f'acao="{nome}"')
+        linhas.append("# TYPE espaco_fitness_bytes_por_envio histogram")
+        linhas += _linhas_histograma("espaco_fitness_bytes_por_envio", dados["bytes_por_envio"], "")
+        linhas.append("# TYPE espaco_fitness_atualizacoes_total counter")
+        linhas.append(f"espaco_fitness_atualizacoes_total {dados['atualizacoes']}")
+        linhas.append("# TYPE espaco_fitness_sessoes gauge")
+        linhas.append(f"espaco_fitness_sessoes {len(dados['sessoes'])}")
+        linhas.append("# TYPE espaco_fitness_tarefas_ativas gauge")
+        for id_sessao, sessao in dados["sessoes"].items():
+            for tarefa, quantidade in sessao["tarefas_ativas"].items():
+                linhas.append(f'espaco_fitness_tarefas_ativas{{sessao="{id_sessao}",tarefa="{tarefa}"}} {quantidade}')
+        return "\n".join(linhas) + "\n"
+
+    # Grava as métricas no arquivo (troca atômica, para quem lê o
+    # arquivo nunca ver um despejo pela metade).
+    def despejar(self, caminho: str):
+        conteudo = self.exportar_json() if caminho.endswith(".json") else self.exportar_prometheus()
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(conteudo)
+        os.replace(temporario, caminho)
+
+
+def _linhas_histograma(nome: str, h: dict, rotulos: str) -> list:
+    separador = "," if rotulos else ""
+    linhas = []
+    acumulado = 0
+    for limite, contagem in zip(list(h["faixas"]) + ["+Inf"], h["contagens"]):
+        acumulado += contagem
+        linhas.append(f'{nome}_bucket{{{rotulos}{separador}le="{limite}"}} {acumulado}')
+    sufixo = f"{{{rotulos}}}" if rotulos else ""
+    linhas.append(f"{nome}_sum{sufixo} {h['soma']}")
+    linhas.append(f"{nome}_count{sufixo} {h['quantidade']}")
+    return linhas
+
+
+metricas = RegistroMetricas()
+
+
+# Mede o tempo do bloco e o registra no histograma 'nome' (não faz
+# nada com a instrumentação desligada).
+@contextmanager
+def cronometrar(nome: str):
+    if not metricas.ligado:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        metricas.observar_latencia(nome, time.perf_counter() - inicio)
+
+
+# Versão decorador do cronometrar, para funções e métodos comuns.
+def medir(nome: str):
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvido(*args, **kwargs):
+            with cronometrar(nome):
+                return funcao(*args, **kwargs)
+        return envolvido
+    return decorador
+
+
+_despejo_iniciado = False
+
+
+# Inicia (uma vez por processo) a thread que despeja as métricas no
+# arquivo configurado a cada 'intervalo' segundos.
+def iniciar_despejo_periodico(caminho: str = ARQUIVO_METRICAS, intervalo: float = INTERVALO_METRICAS):
+    global _despejo_iniciado
+    if not caminho or not metricas.ligado or _despejo_iniciado:
+        return
+    _despejo_iniciado = True
+    if os.environ.get("ESPACO_FITNESS_MULTIPROCESSO") == "1":
+        # Cada processo do servidor despeja no seu próprio arquivo.
+        raiz, extensao = os.path.splitext(caminho)
+        caminho = f"{raiz}.{os.getpid()}{extensao}"
+
+    def despejar_sempre():
+        while True:
+            time.sleep(intervalo)
+            try:
+                metricas.despejar(caminho)
+            except OSError as erro:
+                print(f"[metricas] falha ao gravar {caminho}: {erro}")
+
+    threading.Thread(target=despejar_sempre, name="despejo-metricas", daemon=True).start()
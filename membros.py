@@ -0,0 +1,229 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+
+from persistencia import BACKENDS, criar_repositorio, migrar_de_json, normalizar_email
+from seguranca import eh_hash_senha, gerar_hashes_senha
+
+# ===================================================================
+# IMPORTAÇÃO E EXPORTAÇÃO DE MEMBROS EM MASSA
+# Linha de comando para trazer a lista de membros de outro sistema
+# (CSV ou JSON Lines) para o armazenamento de usuários, e para
+# exportá-la de volta. Os arquivos são lidos e escritos linha a linha,
+# então a memória não cresce com o tamanho da lista.
+#
+# Na importação, cada linha é validada e os emails repetidos (já
+# cadastrados ou repetidos no próprio arquivo) são descartados pelo
+# índice único do repositório. No SQLite tudo entra em uma única
+# transação: ou a lista inteira é importada, ou nada.
+#
+# As senhas em texto puro viram hash durante a importação, como no
+# cadastro pelo app, para que nenhuma fique guardada em texto puro.
+# O hash é propositalmente lento, então é ele que limita a velocidade
+# da importação (no custo padrão, cerca de 15 linhas por segundo por
+# núcleo); por isso as linhas repetidas são descartadas antes dele.
+# Com --sem-hash-senhas a importação leva segundos, mas as senhas
+# ficam em texto puro até o primeiro login de cada membro.
+#
+# Uso: python membros.py importar lista.csv [--sem-hash-senhas]
+#      python membros.py exportar lista.jsonl [--sem-senhas]
+# ===================================================================
+
+ARQUIVO_USUARIOS = "users.json"
+FORMATOS = ("csv", "jsonl")
+CAMPOS = ("nome", "email", "password")
+# Nomes de coluna aceitos na importação para cada campo.
+SINONIMOS = {
+    "nome": ("nome", "name"),
+    "email": ("email", "e-mail"),
+    "password": ("password", "senha"),
+}
+SENHAS_POR_LOTE = 1_000
+
+
+def _formato(caminho: str, formato: str = None) -> str:
+    formato = formato or os.path.splitext(caminho)[1].lstrip(".").lower()
+    if formato == "json":
+        formato = "jsonl"
+    if formato not in FORMATOS:
+        raise SystemExit(f"Formato desconhecido: {formato!r} (use --formato {' ou '.join(FORMATOS)})")
+    return formato
+
+
+# -------------------------------------------------------------------
+# LEITURA E VALIDAÇÃO
+# -------------------------------------------------------------------
+
+# Gera as linhas do arquivo como tuplas (nome, email, senha), sem
+# lê-lo inteiro. Linhas ilegíveis viram None.
+def _ler_linhas(caminho: str, formato: str):
+    if formato == "csv":
+        with open(caminho, "r", encoding="utf-8-sig", newline="") as f:
+            leitor = csv.reader(f)
+            cabecalho = [c.strip().lower() for c in next(leitor, [])]
+            # A posição de cada campo é resolvida uma vez, pelo cabeçalho.
+            posicoes = [next((cabecalho.index(n) for n in SINONIMOS[c] if n in cabecalho), None) for c in CAMPOS]
+            if None in posicoes:
+                raise SystemExit(f"O CSV precisa das colunas {', '.join(CAMPOS)} (cabeçalho lido: {cabecalho})")
+            minimo = max(posicoes) + 1
+            for linha in leitor:
+                yield tuple(linha[i] for i in posicoes) if len(linha) >= minimo else None
+        return
+    with open(caminho, "r", encoding="utf-8") as f:
+        for linha in f:
+            linha = linha.strip()
+            if not linha:
+                continue
+            try:
+                registro = json.loads(linha)
+            except json.JSONDecodeError:
+                yield None
+                continue
+            yield tuple(_campo(registro, c) for c in CAMPOS) if isinstance(registro, dict) else None
+
+
+def _campo(registro: dict, campo: str) -> str:
+    for nome in SINONIMOS[campo]:
+        valor = registro.get(nome)
+        if valor is not None:
+            return str(valor)
+    return ""
+
+
+# Como no formulário de cadastro, nome, email e senha são obrigatórios;
+# como os dados vêm de outro sistema, o email também precisa ter a
+# forma usuario@dominio.
+def _validar(linha) -> dict:
+    if linha is None:
+        return None
+    nome, email, senha = (valor.strip() for valor in linha)
+    if not nome or not senha:
+        return None
+    usuario, _, dominio = email.partition("@")
+    if not usuario or "." not in dominio or " " in email:
+        return None
+    return {"nome": nome, "email": email, "password": senha}
+
+
+class Contagem:
+    def __init__(self):
+        self.lidas = 0
+        self.invalidas = 0
+
+
+# Gera os usuários válidos do arquivo, contando as linhas descartadas.
+def _usuarios_validos(caminho: str, formato: str, contagem: Contagem):
+    for linha in _ler_linhas(caminho, formato):
+        contagem.lidas += 1
+        usuario = _validar(linha)
+        if usuario is None:
+            contagem.invalidas += 1
+            continue
+        yield usuario
+
+
+# Troca as senhas em texto puro por hash, usando todos os núcleos do
+# pool de senhas, um lote por vez para a memória não crescer. Senhas
+# que já vêm como hash (ex.: exportadas deste app) são mantidas.
+# Antes do hash, cada lote perde os emails repetidos nele e os que já
+# estão no repositório. Este gerador é consumido por adicionar_varios,
+# então a consulta ao repositório já enxerga os lotes anteriores do
+# mesmo arquivo: nenhuma linha repetida paga um hash.
+def _com_hash(usuarios, repositorio):
+    while True:
+        lote = list(itertools.islice(usuarios, SENHAS_POR_LOTE))
+        if not lote:
+            return
+        unicos = {}
+        for usuario in lote:
+            unicos.setdefault(normalizar_email(usuario["email"]), usuario)
+        cadastrados = repositorio.emails_cadastrados(unicos)
+        lote = [usuario for chave, usuario in unicos.items() if chave not in cadastrados]
+        pendentes = [u for u in lote if not eh_hash_senha(u["password"])]
+        for usuario, senha_hash in zip(pendentes, gerar_hashes_senha([u["password"] for u in pendentes])):
+            usuario["password"] = senha_hash
+        yield from lote
+
+
+# -------------------------------------------------------------------
+# COMANDOS
+# -------------------------------------------------------------------
+
+def importar(repositorio, caminho: str, formato: str = None, hash_senhas: bool = True) -> dict:
+    formato = _formato(caminho, formato)
+    contagem = Contagem()
+    usuarios = _usuarios_validos(caminho, formato, contagem)
+    if hash_senhas:
+        usuarios = _com_hash(usuarios, repositorio)
+    inicio = time.perf_counter()
+    inseridos = repositorio.adicionar_varios(usuarios)
+    return {
+        "lidas": contagem.lidas,
+        "invalidas": contagem.invalidas,
+        "inseridos": inseridos,
+        "repetidos": contagem.lidas - contagem.invalidas - inseridos,
+        "segundos": time.perf_counter() - inicio,
+    }
+
+
+def exportar(repositorio, caminho: str, formato: str = None, com_senhas: bool = True) -> int:
+    formato = _formato(caminho, formato)
+    campos = CAMPOS if com_senhas else CAMPOS[:2]
+    quantidade = 0
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", encoding="utf-8", newline="") as f:
+        if formato == "csv":
+            escritor = csv.writer(f)
+            escritor.writerow(campos)
+        for usuario in repositorio.iterar():
+            if formato == "csv":
+                escritor.writerow([usuario[c] for c in campos])
+            else:
+                f.write(json.dumps({c: usuario[c] for c in campos}, ensure_ascii=False) + "\n")
+            quantidade += 1
+    os.replace(temporario, caminho)
+    return quantidade
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Importa ou exporta a lista de membros (CSV ou JSON Lines).")
+    parser.add_argument("--backend", default=os.environ.get("ESPACO_FITNESS_BACKEND", "sqlite"), choices=BACKENDS)
+    parser.add_argument("--usuarios", default=ARQUIVO_USUARIOS, help="users.json do app (os outros backends ficam ao lado dele)")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    parser_importar = comandos.add_parser("importar", help="adiciona os membros do arquivo aos usuários")
+    parser_importar.add_argument("arquivo")
+    parser_importar.add_argument("--formato", choices=FORMATOS)
+    parser_importar.add_argument("--sem-hash-senhas", action="store_true",
+                                 help="grava as senhas em texto puro como vieram (segundos em vez de horas para "
+                                      "listas de milhões); elas só viram hash no primeiro login de cada membro e "
+                                      "ficam em texto puro até lá")
+
+    parser_exportar = comandos.add_parser("exportar", help="grava todos os membros no arquivo")
+    parser_exportar.add_argument("arquivo")
+    parser_exportar.add_argument("--formato", choices=FORMATOS)
+    parser_exportar.add_argument("--sem-senhas", action="store_true",
+                                 help="omite a coluna password (o arquivo não poderá ser importado de volta)")
+
+    argumentos = parser.parse_args(argumentos)
+    repositorio = criar_repositorio(argumentos.backend, argumentos.usuarios)
+    migrar_de_json(repositorio, argumentos.usuarios)
+    try:
+        if argumentos.comando == "importar":
+            resultado = importar(repositorio, argumentos.arquivo, argumentos.formato, not argumentos.sem_hash_senhas)
+            print(f"{resultado['lidas']} linhas lidas: {resultado['inseridos']} membros importados, "
+                  f"{resultado['repetidos']} emails repetidos e {resultado['invalidas']} linhas inválidas "
+                  f"({resultado['segundos']:.1f} s).")
+        else:
+            quantidade = exportar(repositorio, argumentos.arquivo, argumentos.formato, not argumentos.sem_senhas)
+            print(f"{quantidade} membros exportados para {argumentos.arquivo}.")
+    finally:
+        repositorio.fechar()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,784 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+# ===================================================================
+# REPOSITÓRIOS DE USUÁRIOS
+# Camada de persistência "plugável": o app conversa apenas com a
+# interface RepositorioUsuarios e o backend concreto (JSON, SQLite ou
+# diário append-only) é escolhido na inicialização.
+# ===================================================================
+
+BACKENDS = ("json", "sqlite", "journal")
+
+
+# Forma canônica do email usada como chave em todos os índices:
+# "Vini@Vini.com " e "vini@vini.com" são o mesmo usuário.
+def normalizar_email(email: str) -> str:
+    return email.strip().casefold()
+
+
+# Forma canônica do nome usada na busca por prefixo (tela de membros).
+def normalizar_nome(nome: str) -> str:
+    return " ".join(nome.split()).casefold()
+
+
+CAMPOS_BUSCA = ("nome", "email")
+_CHAVES_BUSCA = {
+    "nome": lambda usuario: normalizar_nome(usuario["nome"]),
+    "email": lambda usuario: normalizar_email(usuario["email"]),
+}
+# Maior caractere possível: "abc" + ele é o limite superior de todas as
+# chaves que começam com "abc".
+_FIM_PREFIXO = "\U0010ffff"
+
+
+# Interface comum a todos os backends. Os usuários são dicionários
+# no mesmo formato do users.json original: {"nome", "email", "password"}.
+class RepositorioUsuarios:
+    # Retorna a lista completa de usuários.
+    def carregar(self) -> list:
+        raise NotImplementedError
+
+    # Insere um usuário. Retorna False se o email já estiver cadastrado.
+    def adicionar(self, usuario: dict) -> bool:
+        return self.adicionar_varios([usuario]) == 1
+
+    # Insere vários usuários em uma única escrita/transação e retorna
+    # quantos foram realmente inseridos (emails repetidos são ignorados).
+    def adicionar_varios(self, usuarios) -> int:
+        raise NotImplementedError
+
+    # Substitui todo o conteúdo do repositório (usado na migração e
+    # pela função legada salvar_usuarios).
+    def salvar_todos(self, usuarios: list):
+        raise NotImplementedError
+
+    # Troca o valor guardado da senha de um usuário (ex.: migração de
+    # texto puro para hash). Retorna False se o email não existir.
+    def atualizar_senha(self, email: str, password: str) -> bool:
+        raise NotImplementedError
+
+    # Busca um usuário pelo email (sem diferenciar maiúsculas).
+    # Os backends com índice próprio sobrescrevem este método.
+    def buscar_por_email(self, email: str):
+        chave = normalizar_email(email)
+        return next((u for u in self.carregar() if normalizar_email(u["email"]) == chave), None)
+
+    def contar(self) -> int:
+        return len(self.carregar())
+
+    # Dos emails informados, retorna (normalizados) os que já estão
+    # cadastrados. Usado pela importação em massa para descartar os
+    # repetidos antes de calcular o hash das senhas; pode ser chamado
+    # de dentro do gerador passado a adicionar_varios, e então enxerga
+    # também o que ele já inseriu.
+    def emails_cadastrados(self, emails) -> set:
+        chaves = {normalizar_email(e) for e in emails}
+        return chaves & {normalizar_email(u["email"]) for u in self.carregar()}
+
+    # Página de usuários cujo nome ou email ('campo') começa com
+    # 'prefixo', em ordem alfabética, para a tela de membros. Paginação
+    # por chave: 'apos' é o cursor devolvido pela página anterior (None
+    # na primeira). Retorna (usuarios, cursor da próxima página ou None).
+    # Os usuários vêm sem a senha. Esta versão genérica percorre todos
+    # os usuários; o SQLite usa índices.
+    def buscar_pagina(self, prefixo: str = "", campo: str = "nome", apos=None, limite: int = 50):
+        chave = _CHAVES_BUSCA[campo]
+        prefixo = normalizar_nome(prefixo) if campo == "nome" else normalizar_email(prefixo)
+        candidatos = sorted(
+            (chave(u), normalizar_email(u["email"]), u) for u in self.carregar() if chave(u).startswith(prefixo)
+        )
+        if apos is not None:
+            candidatos = [c for c in candidatos if c[:2] > tuple(apos)]
+        pagina = [{"nome": u["nome"], "email": u["email"]} for _, _, u in candidatos[:limite]]
+        proximo = candidatos[limite - 1][:2] if len(candidatos) > limite else None
+        return pagina, proximo
+
+    # Percorre os usuários um a um (exportação). Os backends que
+    # conseguem ler aos poucos sobrescrevem este método para não
+    # carregar tudo na memória.
+    def iterar(self):
+        yield from self.carregar()
+
+    # Valor que muda sempre que os dados persistidos mudam (inclusive
+    # por outro processo). Usado pelo CacheUsuarios para invalidação.
+    def assinatura(self):
+        raise NotImplementedError
+
+    # Assinatura lida logo após a última escrita feita por este objeto.
+    # Fica None nos backends em que as próprias escritas não mudam a
+    # assinatura (SQLite).
+    assinatura_propria = None
+
+    def fechar(self):
+        pass
+
+
+# Assinatura barata de um arquivo (tamanho + data de modificação),
+# usada para descobrir se ele mudou sem precisar relê-lo.
+def _assinatura_arquivo(caminho: str):
+    try:
+        info = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    return (info.st_mtime_ns, info.st_size)
+
+
+# Escreve o arquivo de forma atômica: grava em um temporário no mesmo
+# diretório e troca com os.replace, assim um leitor nunca vê um JSON
+# pela metade e uma falha no meio da escrita não corrompe o original.
+def _escrever_atomico(caminho: str, conteudo: str):
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(conteudo)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+
+# -------------------------------------------------------------------
+# BACKEND 1: JSON (formato original)
+# Mantido por compatibilidade. Cada inserção ainda reescreve o
+# arquivo inteiro (O(N)), mas agora de forma atômica e serializada
+# por um lock, então cadastros simultâneos não se sobrescrevem.
+# -------------------------------------------------------------------
+class JsonRepositorio(RepositorioUsuarios):
+    def __init__(self, arquivo: str):
+        self.arquivo = arquivo
+        self._lock = threading.Lock()
+        self._emails = None
+        self._assinatura_emails = None
+        # Emails do adicionar_varios em andamento (ainda não gravados).
+        self._novos = set()
+
+    def carregar(self) -> list:
+        if not os.path.exists(self.arquivo):
+            _escrever_atomico(self.arquivo, "[]")
+        with open(self.arquivo, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def adicionar_varios(self, usuarios) -> int:
+        with self._lock:
+            atuais = self.carregar()
+            emails = {normalizar_email(u["email"]) for u in atuais}
+            novos = self._novos = set()
+            inseridos = 0
+            try:
+                for usuario in usuarios:
+                    chave = normalizar_email(usuario["email"])
+                    if chave in emails or chave in novos:
+                        continue
+                    novos.add(chave)
+                    atuais.append(dict(usuario))
+                    inseridos += 1
+                if inseridos:
+                    _escrever_atomico(self.arquivo, json.dumps(atuais, indent=4))
+                    self.assinatura_propria = self.assinatura()
+            finally:
+                novos.clear()
+            return inseridos
+
+    def salvar_todos(self, usuarios: list):
+        with self._lock:
+            _escrever_atomico(self.arquivo, json.dumps(usuarios, indent=4))
+            self.assinatura_propria = self.assinatura()
+
+    def atualizar_senha(self, email: str, password: str) -> bool:
+        chave = normalizar_email(email)
+        with self._lock:
+            usuarios = self.carregar()
+            usuario = next((u for u in usuarios if normalizar_email(u["email"]) == chave), None)
+            if usuario is None:
+                return False
+            usuario["password"] = password
+            _escrever_atomico(self.arquivo, json.dumps(usuarios, indent=4))
+            self.assinatura_propria = self.assinatura()
+            return True
+
+    # O conjunto de emails só é relido quando o arquivo muda, para a
+    # importação não reler o JSON inteiro a cada lote.
+    def emails_cadastrados(self, emails) -> set:
+        assinatura = self.assinatura()
+        if self._emails is None or self._assinatura_emails != assinatura:
+            self._emails = {normalizar_email(u["email"]) for u in self.carregar()}
+            self._assinatura_emails = assinatura
+        return {c for c in (normalizar_email(e) for e in emails) if c in self._emails or c in self._novos}
+
+    def assinatura(self):
+        return _assinatura_arquivo(self.arquivo)
+
+
+# -------------------------------------------------------------------
+# BACKEND 2: SQLITE
+# Banco embutido com o email normalizado como chave única: inserção em
+# O(log N) dentro de uma transação, sem reescrever nada.
+# O modo WAL permite leituras enquanto outra conexão escreve.
+# -------------------------------------------------------------------
+class SqliteRepositorio(RepositorioUsuarios):
+    def __init__(self, arquivo: str):
+        self.arquivo = arquivo
+        # Os handlers do Flet rodam em threads diferentes, então a
+        # conexão é compartilhada e protegida pelo lock abaixo. Ele é
+        # reentrante porque emails_cadastrados pode ser chamado pelo
+        # gerador que adicionar_varios está consumindo.
+        self._lock = threading.RLock()
+        self._conexao = sqlite3.connect(arquivo, check_same_thread=False, timeout=30)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS usuarios ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " email TEXT NOT NULL,"
+            " email_chave TEXT NOT NULL UNIQUE,"
+            " nome TEXT NOT NULL,"
+            " password TEXT NOT NULL,"
+            " nome_chave TEXT NOT NULL DEFAULT '')"
+        )
+        self._migrar_nome_chave()
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS usuarios_nome_chave ON usuarios (nome_chave)")
+        self._conexao.commit()
+
+    # Bancos criados antes da busca por nome não têm a coluna
+    # nome_chave: ela é criada e preenchida uma única vez.
+    def _migrar_nome_chave(self):
+        colunas = {linha[1] for linha in self._conexao.execute("PRAGMA table_info(usuarios)")}
+        if "nome_chave" in colunas:
+            return
+        self._conexao.create_function("normalizar_nome", 1, normalizar_nome, deterministic=True)
+        with self._conexao:
+            self._conexao.execute("ALTER TABLE usuarios ADD COLUMN nome_chave TEXT NOT NULL DEFAULT ''")
+            self._conexao.execute("UPDATE usuarios SET nome_chave = normalizar_nome(nome)")
+
+    def carregar(self) -> list:
+        with self._lock:
+            linhas = self._conexao.execute("SELECT nome, email, password FROM usuarios ORDER BY id").fetchall()
+        return [{"nome": nome, "email": email, "password": senha} for nome, email, senha in linhas]
+
+    def adicionar_varios(self, usuarios) -> int:
+        with self._lock, self._conexao:
+            antes = self._conexao.total_changes
+            self._conexao.executemany(
+                "INSERT OR IGNORE INTO usuarios (nome, nome_chave, email, email_chave, password) VALUES (?, ?, ?, ?, ?)",
+                ((u["nome"], normalizar_nome(u["nome"]), u["email"], normalizar_email(u["email"]), u["password"])
+                 for u in usuarios),
+            )
+            return self._conexao.total_changes - antes
+
+    def salvar_todos(self, usuarios: list):
+        with self._lock, self._conexao:
+            self._conexao.execute("DELETE FROM usuarios")
+            self._conexao.executemany(
+                "INSERT OR IGNORE INTO usuarios (nome, nome_chave, email, email_chave, password) VALUES (?, ?, ?, ?, ?)",
+                ((u["nome"], normalizar_nome(u["nome"]), u["email"], normalizar_email(u["email"]), u["password"])
+                 for u in usuarios),
+            )
+
+    def atualizar_senha(self, email: str, password: str) -> bool:
+        with self._lock, self._conexao:
+            cursor = self._conexao.execute(
+                "UPDATE usuarios SET password = ? WHERE email_chave = ?", (password, normalizar_email(email))
+            )
+            return cursor.rowcount > 0
+
+    def buscar_por_email(self, email: str):
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT nome, email, password FROM usuarios WHERE email_chave = ?", (normalizar_email(email),)
+            ).fetchone()
+        return None if linha is None else {"nome": linha[0], "email": linha[1], "password": linha[2]}
+
+    def contar(self) -> int:
+        with self._lock:
+            return self._conexao.execute("SELECT COUNT(*) FROM usuarios").fetchone()[0]
+
+    # Consulta pelo índice único de email_chave. Dentro da transação de
+    # adicionar_varios a mesma conexão já enxerga as linhas inseridas.
+    def emails_cadastrados(self, emails) -> set:
+        chaves = list({normalizar_email(e) for e in emails})
+        encontrados = set()
+        with self._lock:
+            for inicio in range(0, len(chaves), 500):
+                parte = chaves[inicio:inicio + 500]
+                encontrados.update(linha[0] for linha in self._conexao.execute(
+                    f"SELECT email_chave FROM usuarios WHERE email_chave IN ({', '.join('?' * len(parte))})", parte))
+        return encontrados
+
+    # Busca por faixa no índice da chave (nome_chave ou o índice único
+    # de email_chave): chave >= prefixo e < prefixo + maior caractere.
+    # O cursor é (chave, id) da última linha, então cada página custa
+    # o mesmo, seja a primeira ou a milésima.
+    def buscar_pagina(self, prefixo: str = "", campo: str = "nome", apos=None, limite: int = 50):
+        if campo == "nome":
+            coluna, prefixo = "nome_chave", normalizar_nome(prefixo)
+        elif campo == "email":
+            coluna, prefixo = "email_chave", normalizar_email(prefixo)
+        else:
+            raise ValueError(f"Campo de busca desconhecido: {campo!r} (use um de {', '.join(CAMPOS_BUSCA)})")
+        condicoes = [f"{coluna} >= ?", f"{coluna} < ?"]
+        parametros = [prefixo, prefixo + _FIM_PREFIXO]
+        if apos is not None:
+            condicoes.append(f"({coluna}, id) > (?, ?)")
+            parametros += list(apos)
+        with self._lock:
+            linhas = self._conexao.execute(
+                f"SELECT {coluna}, id, nome, email FROM usuarios WHERE {' AND '.join(condicoes)}"
+                f" ORDER BY {coluna}, id LIMIT ?",
+                (*parametros, limite + 1),
+            ).fetchall()
+        pagina = [{"nome": nome, "email": email} for _, _, nome, email in linhas[:limite]]
+        proximo = tuple(linhas[limite - 1][:2]) if len(linhas) > limite else None
+        return pagina, proximo
+
+    # Lê em páginas pela chave primária: memória constante, e o lock só
+    # fica preso durante a leitura de cada página.
+    def iterar(self, tamanho_pagina: int = 10_000):
+        ultimo_id = 0
+        while True:
+            with self._lock:
+                linhas = self._conexao.execute(
+                    "SELECT id, nome, email, password FROM usuarios WHERE id > ? ORDER BY id LIMIT ?",
+                    (ultimo_id, tamanho_pagina),
+                ).fetchall()
+            if not linhas:
+                return
+            for ultimo_id, nome, email, senha in linhas:
+                yield {"nome": nome, "email": email, "password": senha}
+
+    # O data_version do SQLite muda quando outra conexão confirma uma
+    # transação, mas não com as escritas desta conexão (por isso
+    # assinatura_propria fica None).
+    def assinatura(self):
+        with self._lock:
+            return self._conexao.execute("PRAGMA data_version").fetchone()[0]
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+
+# -------------------------------------------------------------------
+# BACKEND 3: DIÁRIO APPEND-ONLY (JSON Lines)
+# Cada usuário é uma linha JSON adicionada ao fim do arquivo, então
+# o cadastro custa O(1). Uma linha incompleta no fim (queda durante
+# a escrita) é ignorada na leitura. Alterações (troca de senha) também
+# são novas linhas: na leitura, a última linha de cada email vale.
+# -------------------------------------------------------------------
+class JournalRepositorio(RepositorioUsuarios):
+    LINHAS_POR_ESCRITA = 10_000
+
+    def __init__(self, arquivo: str):
+        self.arquivo = arquivo
+        # Reentrante: emails_cadastrados pode ser chamado pelo gerador
+        # que adicionar_varios está consumindo.
+        self._lock = threading.RLock()
+        self._emails = None
+        self._assinatura_emails = None
+        self._novos = set()
+
+    def carregar(self) -> list:
+        por_email = {}
+        if os.path.exists(self.arquivo):
+            with open(self.arquivo, "r", encoding="utf-8", errors="replace") as f:
+                for linha in f:
+                    try:
+                        usuario = json.loads(linha)
+                    except json.JSONDecodeError:
+                        continue
+                    # Um pedaço de linha pode ser JSON válido sem ser um
+                    # usuário (ex.: um número): também é ignorado.
+                    if not isinstance(usuario, dict) or not isinstance(usuario.get("email"), str):
+                        continue
+                    por_email[normalizar_email(usuario["email"])] = usuario
+        return list(por_email.values())
+
+    def _anexar(self, linhas: list):
+        with open(self.arquivo, "ab+") as f:
+            # Se a última escrita foi interrompida, o arquivo termina no
+            # meio de uma linha: ela é encerrada aqui (e ignorada na
+            # leitura) para que a linha nova não seja colada a ela.
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            f.write("".join(linhas).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+
+    # O conjunto de emails é mantido em memória para checar duplicatas
+    # sem reler o diário a cada cadastro; só é refeito se outro
+    # processo tiver alterado o arquivo.
+    def _atualizar_emails(self):
+        if self._emails is None or self._assinatura_emails != self.assinatura():
+            self._emails = {normalizar_email(u["email"]) for u in self.carregar()}
+            self._assinatura_emails = self.assinatura()
+
+    def emails_cadastrados(self, emails) -> set:
+        with self._lock:
+            self._atualizar_emails()
+            chaves = {normalizar_email(e) for e in emails}
+            return {c for c in chaves if c in self._emails or c in self._novos}
+
+    def adicionar_varios(self, usuarios) -> int:
+        with self._lock:
+            self._atualizar_emails()
+            # Em importações grandes as linhas são gravadas a cada
+            # LINHAS_POR_ESCRITA, sem acumular o lote inteiro na memória.
+            # Os emails só entram no conjunto depois de gravados; os do
+            # bloco atual ficam em 'novos' para barrar repetições nele.
+            linhas = []
+            novos = self._novos = set()
+            inseridos = 0
+            try:
+                for usuario in usuarios:
+                    chave = normalizar_email(usuario["email"])
+                    if chave in self._emails or chave in novos:
+                        continue
+                    novos.add(chave)
+                    linhas.append(json.dumps(usuario, ensure_ascii=False) + "\n")
+                    if len(linhas) >= self.LINHAS_POR_ESCRITA:
+                        self._anexar(linhas)
+                        self._emails |= novos
+                        self._assinatura_emails = self.assinatura()
+                        inseridos += len(linhas)
+                        linhas = []
+                        novos.clear()
+                if linhas:
+                    self._anexar(linhas)
+                    self._emails |= novos
+                    inseridos += len(linhas)
+            except BaseException:
+                # Uma escrita que falhou pode ter gravado parte das
+                # linhas: o conjunto é refeito do arquivo na próxima vez.
+                self._emails = None
+                raise
+            finally:
+                novos.clear()
+            self._assinatura_emails = self.assinatura_propria = self.assinatura()
+            return inseridos
+
+    def atualizar_senha(self, email: str, password: str) -> bool:
+        usuario = self.buscar_por_email(email)
+        if usuario is None:
+            return False
+        with self._lock:
+            self._anexar([json.dumps({**usuario, "password": password}, ensure_ascii=False) + "\n"])
+            self._assinatura_emails = self.assinatura_propria = self.assinatura()
+        return True
+
+    def salvar_todos(self, usuarios: list):
+        with self._lock:
+            _escrever_atomico(self.arquivo, "".join(json.dumps(u, ensure_ascii=False) + "\n" for u in usuarios))
+            self._emails = {normalizar_email(u["email"]) for u in usuarios}
+            self._assinatura_emails = self.assinatura_propria = self.assinatura()
+
+    def assinatura(self):
+        return _assinatura_arquivo(self.arquivo)
+
+
+# ===================================================================
+# ÍNDICE EM MEMÓRIA
+# Dicionário email normalizado -> usuário, mantido pelo app junto
+# com a lista de usuários. Login e checagem de email duplicado viram
+# uma consulta O(1) em vez de percorrer a lista inteira.
+# ===================================================================
+class IndiceUsuarios:
+    def __init__(self, usuarios=()):
+        self._por_email = {}
+        self.reconstruir(usuarios)
+
+    # Refaz o índice a partir de uma lista completa (ex.: após recarregar).
+    def reconstruir(self, usuarios):
+        self._por_email = {normalizar_email(u["email"]): u for u in usuarios}
+
+    def adicionar(self, usuario: dict):
+        self._por_email[normalizar_email(usuario["email"])] = usuario
+
+    def buscar(self, email: str):
+        return self._por_email.get(normalizar_email(email))
+
+    def __contains__(self, email: str) -> bool:
+        return normalizar_email(email) in self._por_email
+
+    def __len__(self) -> int:
+        return len(self._por_email)
+
+
+# ===================================================================
+# FILA DE GRAVAÇÃO (WRITE-BEHIND)
+# Os cadastros são confirmados em memória na hora e gravados no disco
+# por uma thread de fundo. Cadastros que chegam juntos são agrupados
+# em um único lote (uma transação / uma escrita) em vez de uma
+# escrita por cadastro, e o handler da UI nunca espera pelo disco.
+# Um lote que falha volta para o início da fila e é tentado de novo,
+# com espera crescente, até ser gravado.
+# ===================================================================
+class FilaGravacao:
+    # Falhas seguidas após as quais esvaziar() desiste de esperar.
+    TENTATIVAS_ESVAZIAR = 3
+
+    # 'gravar' recebe a lista de usuários do lote e faz a escrita.
+    # 'intervalo' é quanto tempo a thread espera para juntar cadastros
+    # antes de gravar; 'tamanho_lote' limita o tamanho de cada lote;
+    # 'espera_maxima' limita a espera entre tentativas após falhas.
+    def __init__(self, gravar, intervalo: float = 0.05, tamanho_lote: int = 1000, espera_maxima: float = 5.0):
+        self._gravar = gravar
+        self.intervalo = intervalo
+        self.tamanho_lote = tamanho_lote
+        self.espera_maxima = espera_maxima
+        self._pendentes = []
+        self._condicao = threading.Condition()
+        self._gravando = False
+        self.lotes_gravados = 0
+        self.falhas_seguidas = 0
+        self.ultimo_erro = None
+        self._thread = threading.Thread(target=self._executar, name="fila-gravacao-usuarios", daemon=True)
+        self._thread.start()
+
+    # Enfileira um usuário e retorna um Future que é concluído quando
+    # ele estiver gravado.
+    def enviar(self, usuario: dict) -> Future:
+        futuro = Future()
+        with self._condicao:
+            self._pendentes.append((usuario, futuro))
+            self._condicao.notify_all()
+        return futuro
+
+    # Bloqueia até que todos os cadastros enfileirados estejam no disco.
+    # Usado no encerramento do app e por scripts de manutenção. Retorna
+    # False se o tempo acabar ou se a gravação falhar
+    # TENTATIVAS_ESVAZIAR vezes seguidas durante a espera; nesse caso
+    # os cadastros continuam na fila.
+    def esvaziar(self, timeout: float = None) -> bool:
+        with self._condicao:
+            limite = self.falhas_seguidas + self.TENTATIVAS_ESVAZIAR
+            self._condicao.wait_for(
+                lambda: (not self._pendentes and not self._gravando) or self.falhas_seguidas >= limite, timeout)
+            return not self._pendentes and not self._gravando
+
+    def __len__(self) -> int:
+        with self._condicao:
+            return len(self._pendentes)
+
+    def _executar(self):
+        while True:
+            with self._condicao:
+                self._condicao.wait_for(lambda: self._pendentes)
+            # Espera um pouco para que cadastros simultâneos caiam no mesmo lote.
+            time.sleep(self.intervalo)
+            with self._condicao:
+                lote = self._pendentes[:self.tamanho_lote]
+                del self._pendentes[:self.tamanho_lote]
+                self._gravando = True
+            espera = 0.0
+            try:
+                self._gravar([usuario for usuario, _ in lote])
+            except Exception as erro:
+                with self._condicao:
+                    self._pendentes[:0] = lote
+                    self.falhas_seguidas += 1
+                    self.ultimo_erro = erro
+                    espera = min(self.intervalo * 2 ** self.falhas_seguidas, self.espera_maxima)
+                print(f"[persistencia] falha ao gravar {len(lote)} cadastro(s), "
+                      f"nova tentativa em {espera:.1f} s: {erro!r}")
+            else:
+                with self._condicao:
+                    self.falhas_seguidas = 0
+                    self.ultimo_erro = None
+                    self.lotes_gravados += 1
+                for _, futuro in lote:
+                    futuro.set_result(True)
+            finally:
+                with self._condicao:
+                    self._gravando = False
+                    self._condicao.notify_all()
+            time.sleep(espera)
+
+
+# ===================================================================
+# CACHE COMPARTILHADO
+# Uma única cópia em memória dos usuários (lista + índice) para todo
+# o processo, compartilhada por todas as sessões do Flet. Os dados só
+# são relidos quando a assinatura do repositório muda (arquivo
+# alterado por fora); cadastros feitos pelo cache atualizam a cópia
+# em memória diretamente, e todas as sessões já os enxergam.
+# Com 'gravacao_adiada', os cadastros vão para uma FilaGravacao e o
+# cache guarda os ainda não gravados para não perdê-los numa recarga.
+# ===================================================================
+class CacheUsuarios:
+    def __init__(self, repositorio: RepositorioUsuarios, gravacao_adiada: bool = False):
+        self.repositorio = repositorio
+        self._lock = threading.RLock()
+        self._usuarios = []
+        self._indice = IndiceUsuarios()
+        self._assinatura = object()
+        self._nao_gravados = {}
+        self.recargas = 0
+        self.fila = FilaGravacao(self._gravar_lote) if gravacao_adiada else None
+
+    # Relê o repositório se ele mudou desde a última leitura.
+    # Custa apenas um os.stat (ou um PRAGMA) quando nada mudou.
+    def _validar(self):
+        assinatura = self.repositorio.assinatura()
+        if assinatura != self._assinatura:
+            self._recarregar(assinatura)
+
+    def _recarregar(self, assinatura):
+        usuarios = self.repositorio.carregar()
+        self._indice.reconstruir(usuarios)
+        # Cadastros ainda na fila não estão no disco: reaplica-os.
+        for chave, usuario in self._nao_gravados.items():
+            if self._indice.buscar(chave) is None:
+                usuarios.append(usuario)
+                self._indice.adicionar(usuario)
+        self._usuarios = usuarios
+        self._assinatura = assinatura
+        self.recargas += 1
+
+    # Força a releitura completa, independente da assinatura.
+    def recarregar(self):
+        with self._lock:
+            self._recarregar(self.repositorio.assinatura())
+
+    # Lista atual de usuários (não deve ser modificada por quem chama).
+    def usuarios(self) -> list:
+        with self._lock:
+            self._validar()
+            return self._usuarios
+
+    def buscar(self, email: str):
+        with self._lock:
+            self._validar()
+            return self._indice.buscar(email)
+
+    def __contains__(self, email: str) -> bool:
+        return self.buscar(email) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._validar()
+            return len(self._indice)
+
+    # Cadastra um usuário. Sem fila, grava pelo repositório e atualiza
+    # a cópia em memória sem reler tudo (ou faz uma recarga completa se
+    # o repositório tiver mudado por fora antes da escrita). Com fila,
+    # o usuário entra na memória na hora e é gravado em segundo plano.
+    def adicionar(self, usuario: dict) -> bool:
+        with self._lock:
+            if self.fila is not None:
+                self._validar()
+                if self._indice.buscar(usuario["email"]) is not None:
+                    return False
+                self._usuarios.append(usuario)
+                self._indice.adicionar(usuario)
+                self._nao_gravados[normalizar_email(usuario["email"])] = usuario
+                self.fila.enviar(usuario)
+                return True
+
+            antes = self.repositorio.assinatura()
+            inserido = self.repositorio.adicionar(usuario)
+            if inserido and self._aceitar_escrita_propria(antes):
+                self._usuarios.append(usuario)
+                self._indice.adicionar(usuario)
+            else:
+                self._recarregar(self.repositorio.assinatura())
+            return inserido
+
+    # Troca a senha guardada do usuário na memória e no repositório.
+    # Se o cadastro ainda estiver na fila de gravação, basta alterar a
+    # memória: a fila gravará o valor novo.
+    def atualizar_senha(self, email: str, password: str) -> bool:
+        with self._lock:
+            self._validar()
+            usuario = self._indice.buscar(email)
+            if usuario is None:
+                return False
+            usuario["password"] = password
+            if normalizar_email(email) in self._nao_gravados:
+                return True
+            antes = self.repositorio.assinatura()
+            self.repositorio.atualizar_senha(email, password)
+            self._aceitar_escrita_propria(antes)
+            return True
+
+    # Chamado pela thread da fila. A escrita acontece fora do lock para
+    # que logins e leituras continuem respondendo durante o disco.
+    def _gravar_lote(self, lote: list):
+        antes = self.repositorio.assinatura()
+        inseridos = self.repositorio.adicionar_varios(lote)
+        if inseridos < len(lote):
+            # Quem não foi inserido precisa já estar no repositório (ex.:
+            # gravado por uma tentativa anterior que falhou no meio);
+            # senão o lote volta para a fila.
+            faltando = [u["email"] for u in lote if self.repositorio.buscar_por_email(u["email"]) is None]
+            if faltando:
+                raise RuntimeError(f"{len(faltando)} cadastro(s) recusados pelo repositório: {', '.join(faltando)}")
+        with self._lock:
+            for usuario in lote:
+                self._nao_gravados.pop(normalizar_email(usuario["email"]), None)
+            self._aceitar_escrita_propria(antes)
+
+    # Chamado após uma escrita do cache, com a assinatura lida antes
+    # dela. Retorna True se a cópia em memória pode receber a alteração
+    # sem reler tudo. No SQLite as escritas do cache não mudam a
+    # assinatura, então ela não é tocada: se outro processo gravou
+    # nesse meio-tempo, a próxima leitura recarrega. Nos arquivos, a
+    # assinatura nova só é aceita se o arquivo estava igual ao da
+    # última leitura antes da escrita e não mudou de novo depois dela.
+    def _aceitar_escrita_propria(self, antes) -> bool:
+        propria = self.repositorio.assinatura_propria
+        if propria is None:
+            return True
+        if antes == self._assinatura and self.repositorio.assinatura() == propria:
+            self._assinatura = propria
+            return True
+        return False
+
+    # Emails dos cadastros aceitos que ainda não estão no repositório.
+    def nao_gravados(self) -> list:
+        with self._lock:
+            return sorted(self._nao_gravados)
+
+    # Aguarda a gravação de todos os cadastros pendentes. Se a gravação
+    # não terminar, avisa quais cadastros ficaram só na memória.
+    def esvaziar(self, timeout: float = None) -> bool:
+        if self.fila is None or self.fila.esvaziar(timeout):
+            return True
+        emails = self.nao_gravados()
+        print(f"[persistencia] {len(emails)} cadastro(s) não gravado(s) "
+              f"({self.fila.ultimo_erro!r}): {', '.join(emails)}")
+        return False
+
+
+# ===================================================================
+# CRIAÇÃO E MIGRAÇÃO
+# ===================================================================
+
+# Cria o repositório do backend pedido. Os backends novos guardam os
+# dados ao lado do users.json (users.db / users.jsonl).
+def criar_repositorio(backend: str, arquivo_json: str) -> RepositorioUsuarios:
+    base = os.path.splitext(arquivo_json)[0]
+    if backend == "json":
+        return JsonRepositorio(arquivo_json)
+    if backend == "sqlite":
+        return SqliteRepositorio(f"{base}.db")
+    if backend == "journal":
+        return JournalRepositorio(f"{base}.jsonl")
+    raise ValueError(f"Backend de usuários desconhecido: {backend!r} (use um de {', '.join(BACKENDS)})")
+
+
+# Migração única: se o repositório novo estiver vazio e o users.json
+# existir, copia todos os usuários em uma única transação. Nas
+# execuções seguintes o repositório já tem dados e nada é feito.
+# O users.json original é mantido intacto como backup.
+def migrar_de_json(repositorio: RepositorioUsuarios, arquivo_json: str) -> int:
+    if isinstance(repositorio, JsonRepositorio) or not os.path.exists(arquivo_json):
+        return 0
+    if repositorio.contar() > 0:
+        return 0
+    with open(arquivo_json, "r", encoding="utf-8") as f:
+        usuarios = json.load(f)
+    return repositorio.adicionar_varios(usuarios)
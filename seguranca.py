@@ -0,0 +1,252 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# ===================================================================
+# HASH DE SENHAS
+# As senhas são guardadas como hash de uma função de derivação de
+# chave da biblioteca padrão (scrypt ou PBKDF2), com sal aleatório por
+# usuário. O texto guardado descreve o algoritmo e os parâmetros:
+#
+#   scrypt$<n>$<r>$<p>$<sal>$<hash>
+#   pbkdf2_sha256$<iterações>$<sal>$<hash>
+#
+# Qualquer outro valor é tratado como senha legada em texto puro e é
+# trocado por um hash no próximo login bem-sucedido.
+# ===================================================================
+
+ALGORITMOS = ("scrypt", "pbkdf2_sha256")
+
+# Níveis de custo. Quanto maior, mais lento para um atacante testar
+# senhas e também mais CPU por login (veja benchmarks/bench_senhas.py).
+CUSTOS = {
+    "scrypt": {
+        "baixo": {"n": 2 ** 13, "r": 8, "p": 1},
+        "padrao": {"n": 2 ** 14, "r": 8, "p": 1},
+        "alto": {"n": 2 ** 15, "r": 8, "p": 1},
+    },
+    "pbkdf2_sha256": {
+        "baixo": {"iteracoes": 100_000},
+        "padrao": {"iteracoes": 600_000},
+        "alto": {"iteracoes": 1_200_000},
+    },
+}
+
+ALGORITMO_SENHA = os.environ.get("ESPACO_FITNESS_ALGORITMO_SENHA", "scrypt")
+CUSTO_SENHA = os.environ.get("ESPACO_FITNESS_CUSTO_SENHA", "padrao")
+
+TAMANHO_SAL = 16
+TAMANHO_HASH = 32
+
+# As funções de hash do hashlib liberam o GIL, então um pool de threads
+# com uma thread por núcleo aproveita todos os núcleos sem ocupar o
+# loop de eventos do Flet.
+_pool_senhas = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="senhas")
+
+
+def _b64(dados: bytes) -> str:
+    return base64.b64encode(dados).decode("ascii")
+
+
+def _derivar(algoritmo: str, parametros: dict, senha: str, sal: bytes) -> bytes:
+    if algoritmo == "scrypt":
+        n, r, p = parametros["n"], parametros["r"], parametros["p"]
+        return hashlib.scrypt(senha.encode("utf-8"), salt=sal, n=n, r=r, p=p,
+                              maxmem=256 * n * r + 1024 * 1024, dklen=TAMANHO_HASH)
+    if algoritmo == "pbkdf2_sha256":
+        return hashlib.pbkdf2_hmac("sha256", senha.encode("utf-8"), sal, parametros["iteracoes"], dklen=TAMANHO_HASH)
+    raise ValueError(f"Algoritmo de senha desconhecido: {algoritmo!r} (use um de {', '.join(ALGORITMOS)})")
+
+
+# Gera o texto a ser guardado para a senha, com um sal novo.
+def gerar_hash_senha(senha: str, algoritmo: str = None, custo: str = None) -> str:
+    algoritmo = algoritmo or ALGORITMO_SENHA
+    parametros = CUSTOS[algoritmo][custo or CUSTO_SENHA]
+    sal = secrets.token_bytes(TAMANHO_SAL)
+    derivada = _b64(_derivar(algoritmo, parametros, senha, sal))
+    if algoritmo == "scrypt":
+        return f"scrypt${parametros['n']}${parametros['r']}${parametros['p']}${_b64(sal)}${derivada}"
+    return f"pbkdf2_sha256${parametros['iteracoes']}${_b64(sal)}${derivada}"
+
+
+# Separa o texto guardado em (algoritmo, parâmetros, sal, hash).
+# Retorna None para senhas legadas em texto puro.
+def _decompor(armazenado: str):
+    partes = armazenado.split("$")
+    try:
+        if partes[0] == "scrypt" and len(partes) == 6:
+            parametros = {"n": int(partes[1]), "r": int(partes[2]), "p": int(partes[3])}
+            return "scrypt", parametros, base64.b64decode(partes[4]), base64.b64decode(partes[5])
+        if partes[0] == "pbkdf2_sha256" and len(partes) == 4:
+            parametros = {"iteracoes": int(partes[1])}
+            return "pbkdf2_sha256", parametros, base64.b64decode(partes[2]), base64.b64decode(partes[3])
+    except ValueError:
+        return None
+    return None
+
+
+# Diz se o valor guardado já é um hash (e não uma senha legada em
+# texto puro).
+def eh_hash_senha(armazenado: str) -> bool:
+    return _decompor(armazenado) is not None
+
+
+# Confere a senha digitada com o valor guardado. Retorna uma tupla
+# (confere, precisa_rehash): precisa_rehash é True quando a senha
+# estava em texto puro ou foi gerada com algoritmo/custo diferente
+# da configuração atual.
+def verificar_senha(senha: str, armazenado: str, algoritmo: str = None, custo: str = None):
+    algoritmo_atual = algoritmo or ALGORITMO_SENHA
+    parametros_atuais = CUSTOS[algoritmo_atual][custo or CUSTO_SENHA]
+    decomposto = _decompor(armazenado)
+    if decomposto is None:
+        confere = hmac.compare_digest(senha.encode("utf-8"), armazenado.encode("utf-8"))
+        return confere, confere
+    algoritmo_guardado, parametros, sal, esperado = decomposto
+    confere = hmac.compare_digest(_derivar(algoritmo_guardado, parametros, senha, sal), esperado)
+    desatualizado = (algoritmo_guardado, parametros) != (algoritmo_atual, parametros_atuais)
+    return confere, confere and desatualizado
+
+
+# Hash usado para "verificar" logins de emails inexistentes, para que
+# eles demorem o mesmo que um login real e não revelem quais emails
+# estão cadastrados.
+_hash_fantasma = None
+
+
+def verificar_senha_fantasma(senha: str):
+    global _hash_fantasma
+    if _hash_fantasma is None:
+        _hash_fantasma = gerar_hash_senha(secrets.token_hex(8))
+    verificar_senha(senha, _hash_fantasma)
+    return False, False
+
+
+# -------------------------------------------------------------------
+# VERSÕES ASSÍNCRONAS
+# Executam o cálculo no pool de senhas, liberando o loop de eventos.
+# -------------------------------------------------------------------
+
+async def gerar_hash_senha_async(senha: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_pool_senhas, gerar_hash_senha, senha)
+
+
+async def verificar_senha_async(senha: str, armazenado: str):
+    if armazenado is None:
+        return await asyncio.get_running_loop().run_in_executor(_pool_senhas, verificar_senha_fantasma, senha)
+    return await asyncio.get_running_loop().run_in_executor(_pool_senhas, verificar_senha, senha, armazenado)
+
+
+# Hash de várias senhas de uma vez (importação em massa), usando todas
+# as threads do pool de senhas. Retorna os hashes na mesma ordem.
+def gerar_hashes_senha(senhas) -> list:
+    return list(_pool_senhas.map(gerar_hash_senha, senhas))
+
+
+# ===================================================================
+# LIMITE DE TENTATIVAS DE LOGIN
+# Balde de fichas (token bucket) por chave (email ou cliente): cada
+# tentativa gasta uma ficha e as fichas voltam aos poucos. Os baldes
+# ficam em um dicionário LRU de tamanho máximo, então uma enxurrada de
+# emails diferentes não faz a memória crescer: os baldes mais antigos
+# são descartados (um balde parado há tempo suficiente para encher de
+# novo já não guarda informação nenhuma).
+# Com vários processos os baldes ficam em uma tabela SQLite
+# compartilhada ('arquivo'), senão cada processo daria o limite
+# inteiro de novo a quem cair nele.
+# ===================================================================
+
+MAXIMO_BALDES = 100_000
+
+
+class LimitadorTentativas:
+    # 'capacidade': tentativas seguidas permitidas; 'por_segundo':
+    # fichas devolvidas por segundo. 'arquivo': banco SQLite onde os
+    # baldes são compartilhados entre processos (None = só memória);
+    # 'nome' separa, na mesma tabela, os baldes de cada limitador.
+    def __init__(self, capacidade: int, por_segundo: float, maximo_chaves: int = MAXIMO_BALDES,
+                 arquivo: str = None, nome: str = "padrao"):
+        self.capacidade = capacidade
+        self.por_segundo = por_segundo
+        self.maximo_chaves = maximo_chaves
+        self.nome = nome
+        self._baldes = OrderedDict()
+        self._lock = threading.Lock()
+        self._consumos_desde_limpeza = 0
+        self._conexao = None
+        if arquivo is not None:
+            self._conexao = sqlite3.connect(arquivo, check_same_thread=False, timeout=30, isolation_level=None)
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS tentativas ("
+                " limite TEXT NOT NULL,"
+                " chave TEXT NOT NULL,"
+                " fichas REAL NOT NULL,"
+                " ultima REAL NOT NULL,"
+                " PRIMARY KEY (limite, chave))"
+            )
+
+    # Fichas do balde após gastar uma, e a espera (0 se a tentativa foi
+    # permitida). 'balde' é (fichas, ultima) ou None para um balde novo.
+    def _gastar(self, balde, agora: float):
+        if balde is None:
+            fichas = float(self.capacidade)
+        else:
+            fichas, ultima = balde
+            fichas = min(self.capacidade, fichas + max(0.0, agora - ultima) * self.por_segundo)
+        if fichas >= 1:
+            return fichas - 1, 0.0
+        return fichas, (1 - fichas) / self.por_segundo
+
+    # Gasta uma ficha da chave. Retorna 0 se a tentativa foi permitida,
+    # ou quantos segundos faltam para a próxima ficha.
+    def consumir(self, chave) -> float:
+        if self._conexao is not None:
+            return self._consumir_compartilhado(str(chave))
+        agora = time.monotonic()
+        with self._lock:
+            fichas, espera = self._gastar(self._baldes.pop(chave, None), agora)
+            self._baldes[chave] = (fichas, agora)
+            while len(self._baldes) > self.maximo_chaves:
+                self._baldes.popitem(last=False)
+            return espera
+
+    # O mesmo cálculo com o balde no SQLite, em uma transação IMMEDIATE
+    # para que dois processos não gastem a mesma ficha. O relógio é o
+    # de parede, comum a todos os processos. De tempos em tempos os
+    # baldes que já teriam enchido de novo são apagados.
+    def _consumir_compartilhado(self, chave: str) -> float:
+        agora = time.time()
+        with self._lock:
+            conexao = self._conexao
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                balde = conexao.execute("SELECT fichas, ultima FROM tentativas WHERE limite = ? AND chave = ?",
+                                        (self.nome, chave)).fetchone()
+                fichas, espera = self._gastar(balde, agora)
+                conexao.execute("INSERT OR REPLACE INTO tentativas (limite, chave, fichas, ultima) VALUES (?, ?, ?, ?)",
+                                (self.nome, chave, fichas, agora))
+                self._consumos_desde_limpeza += 1
+                if self._consumos_desde_limpeza >= 1000:
+                    self._consumos_desde_limpeza = 0
+                    conexao.execute("DELETE FROM tentativas WHERE limite = ? AND ultima < ?",
+                                    (self.nome, agora - self.capacidade / self.por_segundo))
+                conexao.execute("COMMIT")
+            except BaseException:
+                conexao.execute("ROLLBACK")
+                raise
+            return espera
+
+    def __len__(self) -> int:
+        if self._conexao is not None:
+            with self._lock:
+                return self._conexao.execute("SELECT COUNT(*) FROM tentativas WHERE limite = ?", (self.nome,)).fetchone()[0]
+        return len(self._baldes)
@@ -0,0 +1,77 @@
+import importlib.util
+import os
+import sys
+
+# ===================================================================
+# SERVIDOR WEB COM VÁRIOS PROCESSOS
+# Roda o app como aplicação ASGI (flet.fastapi) sob o uvicorn, com
+# vários processos (workers) atendendo a mesma porta. Cada conexão do
+# navegador fica presa ao processo que a aceitou; o que precisa ser
+# visto por todos (usuários) fica no SQLite em modo WAL, que todos os
+# processos leem e escrevem.
+#
+# Uso: python servidor.py [--workers N] [--porta 8550] [--host 0.0.0.0]
+# Requer: pip install flet-web uvicorn
+# ===================================================================
+
+PASTA_APP = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_APP = os.path.join(PASTA_APP, "Versão final.py")
+
+# Precisa valer em todos os processos, então é definido antes de
+# carregar o app (os workers herdam o ambiente do processo principal).
+os.environ["ESPACO_FITNESS_MULTIPROCESSO"] = "1"
+os.environ.setdefault("ESPACO_FITNESS_BACKEND", "sqlite")
+os.chdir(PASTA_APP)
+sys.path.insert(0, PASTA_APP)
+
+
+# O arquivo principal tem espaço e acento no nome, então é carregado
+# pelo caminho em vez de um import comum.
+def carregar_app():
+    spec = importlib.util.spec_from_file_location("academia_app", ARQUIVO_APP)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules["academia_app"] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+# Monta a aplicação ASGI. Os arquivos de assets/ são servidos em
+# /assets (o mesmo caminho que os ft.Image usam), e as variantes com
+# hash no nome (assets/otimizadas) vão com cache de longa duração.
+def criar_aplicacao():
+    import flet.fastapi as flet_fastapi
+    from starlette.routing import Mount
+    from starlette.staticfiles import StaticFiles
+
+    class ArquivosEstaticos(StaticFiles):
+        def file_response(self, caminho, *args, **kwargs):
+            resposta = super().file_response(caminho, *args, **kwargs)
+            if os.path.basename(os.path.dirname(caminho)) == "otimizadas":
+                resposta.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+            return resposta
+
+    modulo = carregar_app()
+    aplicacao = flet_fastapi.app(modulo.main)
+    # A rota de assets entra antes da rota "/" do Flet, que pega todo o resto.
+    aplicacao.router.routes.insert(0, Mount("/assets", app=ArquivosEstaticos(directory=os.path.join(PASTA_APP, "assets"))))
+    return aplicacao
+
+
+app = criar_aplicacao() if __name__ != "__main__" else None
+
+
+def main():
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Espaço Fitness Academia com vários processos")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--porta", type=int, default=8550)
+    parser.add_argument("--host", default="0.0.0.0")
+    argumentos = parser.parse_args()
+    uvicorn.run("servidor:app", host=argumentos.host, port=argumentos.porta, workers=argumentos.workers)
+
+
+if __name__ == "__main__":
+    main()
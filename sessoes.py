@@ -0,0 +1,168 @@
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# ===================================================================
+# SESSÕES ("LEMBRAR DE MIM")
+# No login com "Lembrar de mim", o servidor cria uma sessão e entrega
+# ao navegador um token assinado, guardado no client_storage. Ao
+# recarregar a página, o token é conferido na tabela de sessões e o
+# membro entra direto, sem consultar os usuários nem verificar senha.
+#
+# Token: <id>.<assinatura>, onde a assinatura é um HMAC-SHA256 do id
+# com a chave secreta do servidor. Tokens forjados ou corrompidos são
+# recusados só pela assinatura, sem consultar a tabela.
+# ===================================================================
+
+DURACAO_SESSAO = 30 * 24 * 60 * 60
+MAXIMO_SESSOES_EM_MEMORIA = 100_000
+ARQUIVO_CHAVE = "chave_sessao.bin"
+
+
+# Chave secreta das assinaturas: vem de ESPACO_FITNESS_CHAVE_SESSAO ou
+# de um arquivo gerado na primeira execução, para que os tokens
+# continuem válidos após reiniciar e em todos os processos do servidor.
+def carregar_chave(arquivo: str = ARQUIVO_CHAVE) -> bytes:
+    chave_ambiente = os.environ.get("ESPACO_FITNESS_CHAVE_SESSAO")
+    if chave_ambiente:
+        return chave_ambiente.encode("utf-8")
+    try:
+        with open(arquivo, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    chave = secrets.token_bytes(32)
+    try:
+        descritor = os.open(arquivo, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # Outro processo criou a chave ao mesmo tempo: usa a dele.
+        with open(arquivo, "rb") as f:
+            return f.read()
+    with os.fdopen(descritor, "wb") as f:
+        f.write(chave)
+    return chave
+
+
+class TabelaSessoes:
+    # 'arquivo': banco SQLite onde as sessões são persistidas (None =
+    # só memória). 'cache_memoria': mantém as sessões também em um
+    # dicionário LRU limitado, para validar em O(1); deve ser desligado
+    # com vários processos, senão um logout feito em um processo não
+    # seria visto pelos outros.
+    def __init__(self, chave: bytes, arquivo: str = None, duracao: float = DURACAO_SESSAO,
+                 maximo_em_memoria: int = MAXIMO_SESSOES_EM_MEMORIA, cache_memoria: bool = True):
+        self._chave = chave
+        self.duracao = duracao
+        self.maximo_em_memoria = maximo_em_memoria
+        self.cache_memoria = cache_memoria or arquivo is None
+        self._lock = threading.Lock()
+        self._memoria = OrderedDict()
+        self._criadas_desde_limpeza = 0
+        self._conexao = None
+        if arquivo is not None:
+            self._conexao = sqlite3.connect(arquivo, check_same_thread=False, timeout=30)
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS sessoes ("
+                " id TEXT PRIMARY KEY,"
+                " email TEXT NOT NULL,"
+                " nome TEXT NOT NULL,"
+                " expira_em REAL NOT NULL)"
+            )
+            self._conexao.commit()
+
+    def _assinar(self, identificador: str) -> str:
+        digest = hmac.new(self._chave, identificador.encode("ascii"), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest[:24]).decode("ascii")
+
+    # Separa e confere a assinatura do token; retorna o id ou None.
+    # O token vem do navegador: qualquer coisa fora do formato (inclusive
+    # caracteres não ASCII) é só um token inválido.
+    def _id_do_token(self, token) -> str:
+        if not isinstance(token, str) or not token.isascii() or token.count(".") != 1:
+            return None
+        identificador, assinatura = token.split(".")
+        if not hmac.compare_digest(assinatura, self._assinar(identificador)):
+            return None
+        return identificador
+
+    def _guardar_em_memoria(self, identificador: str, sessao: dict):
+        self._memoria[identificador] = sessao
+        self._memoria.move_to_end(identificador)
+        while len(self._memoria) > self.maximo_em_memoria:
+            self._memoria.popitem(last=False)
+
+    # Cria uma sessão para o membro e retorna o token a ser guardado
+    # no navegador.
+    def criar(self, email: str, nome: str) -> str:
+        identificador = secrets.token_urlsafe(24)
+        sessao = {"email": email, "nome": nome, "expira_em": time.time() + self.duracao}
+        with self._lock:
+            if self.cache_memoria:
+                self._guardar_em_memoria(identificador, sessao)
+            if self._conexao is not None:
+                with self._conexao:
+                    self._conexao.execute("INSERT INTO sessoes (id, email, nome, expira_em) VALUES (?, ?, ?, ?)",
+                                          (identificador, email, nome, sessao["expira_em"]))
+            # De tempos em tempos, apaga as sessões vencidas do banco.
+            self._criadas_desde_limpeza += 1
+            if self._criadas_desde_limpeza >= 1000:
+                self._criadas_desde_limpeza = 0
+                self._limpar_expiradas()
+        return f"{identificador}.{self._assinar(identificador)}"
+
+    # Retorna {"email", "nome"} da sessão do token, ou None se o token
+    # for inválido, tiver vencido ou tiver sido revogado.
+    def validar(self, token):
+        identificador = self._id_do_token(token)
+        if identificador is None:
+            return None
+        agora = time.time()
+        with self._lock:
+            sessao = self._memoria.get(identificador) if self.cache_memoria else None
+            if sessao is None and self._conexao is not None:
+                linha = self._conexao.execute(
+                    "SELECT email, nome, expira_em FROM sessoes WHERE id = ?", (identificador,)
+                ).fetchone()
+                if linha is not None:
+                    sessao = {"email": linha[0], "nome": linha[1], "expira_em": linha[2]}
+                    if self.cache_memoria:
+                        self._guardar_em_memoria(identificador, sessao)
+            if sessao is None:
+                return None
+            if sessao["expira_em"] < agora:
+                self._remover(identificador)
+                return None
+            if self.cache_memoria:
+                self._memoria.move_to_end(identificador)
+        return {"email": sessao["email"], "nome": sessao["nome"]}
+
+    # Encerra a sessão do token (logout).
+    def revogar(self, token):
+        identificador = self._id_do_token(token)
+        if identificador is not None:
+            with self._lock:
+                self._remover(identificador)
+
+    def _remover(self, identificador: str):
+        self._memoria.pop(identificador, None)
+        if self._conexao is not None:
+            with self._conexao:
+                self._conexao.execute("DELETE FROM sessoes WHERE id = ?", (identificador,))
+
+    def _limpar_expiradas(self):
+        agora = time.time()
+        for identificador in [i for i, s in self._memoria.items() if s["expira_em"] < agora]:
+            del self._memoria[identificador]
+        if self._conexao is not None:
+            with self._conexao:
+                self._conexao.execute("DELETE FROM sessoes WHERE expira_em < ?", (agora,))
+
+    def __len__(self) -> int:
+        return len(self._memoria)